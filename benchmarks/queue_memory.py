@@ -0,0 +1,72 @@
+"""Порівняння пам'яті черги: повні wavelink.Playable проти компактних TrackRecord.
+
+Запуск з кореня репозиторію:
+    python -m benchmarks.queue_memory [кількість_черг] [треків_у_черзі]
+
+Результат на wavelink 3.0.0 (CPython 3.11, 100 x 100 треків):
+    Playable:    ~1359 B/трек
+    TrackRecord:  ~962 B/трек
+    Економія:     ~29%
+"""
+import base64
+import os
+import sys
+import tracemalloc
+
+import wavelink
+
+from utils.tracks import TrackRecord
+
+
+def sample_payload(i):
+    """Типова відповідь Lavalink v4 для треку YouTube"""
+    identifier = base64.urlsafe_b64encode(os.urandom(8)).decode()[:11]
+    return {
+        "encoded": base64.b64encode(os.urandom(180)).decode(),
+        "info": {
+            "identifier": identifier,
+            "isSeekable": True,
+            "author": f"Artist {i} - Topic",
+            "length": 215000 + i,
+            "isStream": False,
+            "position": 0,
+            "title": f"Some Song Title Number {i} (Official Music Video)",
+            "uri": f"https://www.youtube.com/watch?v={identifier}",
+            "artworkUrl": f"https://i.ytimg.com/vi/{identifier}/maxresdefault.jpg",
+            "isrc": f"USRC1{i:07d}",
+            "sourceName": "youtube",
+        },
+        "pluginInfo": {"albumName": f"Album {i}", "artistUrl": f"https://example.com/artist/{i}"},
+        "userData": {},
+    }
+
+
+def measure(build, queues, per_queue):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    data = [[build(q * per_queue + i) for i in range(per_queue)] for q in range(queues)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return size, data
+
+
+def main():
+    queues = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    per_queue = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    total = queues * per_queue
+
+    playable_size, _ = measure(lambda i: wavelink.Playable(sample_payload(i)), queues, per_queue)
+    record_size, _ = measure(
+        lambda i: TrackRecord.from_playable(wavelink.Playable(sample_payload(i)), requester_id=i),
+        queues, per_queue
+    )
+
+    print(f"{queues} черг x {per_queue} треків = {total} треків")
+    print(f"Playable:    {playable_size / 1024 / 1024:8.2f} MiB ({playable_size / total:.0f} B/трек)")
+    print(f"TrackRecord: {record_size / 1024 / 1024:8.2f} MiB ({record_size / total:.0f} B/трек)")
+    print(f"Економія:    {100 * (1 - record_size / playable_size):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,14 @@ import asyncio
 import logging
 import os
 import sys
+import time
 
 import discord
 from discord.ext import commands
 
 from config import Config
+from utils.ipc import IPCClient
+from utils.system import memory_rss
 
 # Налаштування логування
 logging.basicConfig(
@@ -15,8 +18,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger('MusicBot')
 
-class MusicBot(commands.Bot):
-    def __init__(self):
+class MusicBot(commands.AutoShardedBot):
+    def __init__(self, shard_ids=None, shard_count=None):
         intents = discord.Intents.default()
         intents.message_content = True  # Обов'язково для префіксних команд!
         intents.voice_states = True
@@ -25,30 +28,98 @@ class MusicBot(commands.Bot):
             command_prefix='!',  # Префікс тільки !
             intents=intents,
             help_command=None,
-            case_insensitive=True  # Команди не чутливі до регістру
+            case_insensitive=True,  # Команди не чутливі до регістру
+            shard_ids=shard_ids,  # None - усі шарди в одному процесі
+            shard_count=shard_count,  # None - рекомендована Discord кількість
+            # Інакше discord.py чекає будь-який 429 всередині запиту і RateLimited
+            # ніколи не доходить до Outbox
+            max_ratelimit_timeout=Config.DISCORD_MAX_RATELIMIT_TIMEOUT
         )
         
+        # Зв'язок з cluster.py, якщо бот запущено як воркер кластера
+        self.ipc = None
+        if Config.CLUSTER_ID is not None:
+            self.ipc = IPCClient(Config.CLUSTER_SOCKET, Config.CLUSTER_ID)
+            self.ipc.register("shutdown", self._ipc_shutdown)
+            self.ipc.register("presence", self._ipc_presence)
+        self._ipc_announced = False
+        
     async def setup_hook(self):
         # Завантаження когів
         await self.load_extension('cogs.music')
         logger.info("Музичний ког завантажено")
         
+        if self.ipc:
+            try:
+                await self.ipc.connect()
+                self.loop.create_task(self._ipc_stats_loop())
+                logger.info(f"Кластер {Config.CLUSTER_ID}: підключено до хаба")
+            except OSError as e:
+                logger.error(f"Не вдалось підключитись до хаба кластера: {e}")
+        
         # Синхронізація слеш-команд (опціонально)
+        # У кластері синхронізує лише перший процес - команди спільні для всіх
+        if Config.CLUSTER_ID:
+            return
         try:
             synced = await self.tree.sync()
             logger.info(f"Синхронізовано {len(synced)} слеш-команд")
         except Exception as e:
             logger.error(f"Помилка синхронізації: {e}")
     
+    async def on_shard_ready(self, shard_id):
+        logger.info(f"Шард {shard_id} готовий")
+    
+    async def on_shard_disconnect(self, shard_id):
+        logger.warning(f"Шард {shard_id} відключився від Discord")
+    
     async def on_ready(self):
         logger.info(f'{self.user} успішно запущено!')
         logger.info(f'ID бота: {self.user.id}')
+        logger.info(f'Шарди: {sorted(self.shards)} з {self.shard_count}, серверів: {len(self.guilds)}')
         logger.info(f'Префікс команд: !')
         activity = discord.Activity(
             type=discord.ActivityType.listening,
             name="музику | !play"
         )
         await self.change_presence(activity=activity)
+        
+        # on_ready буває і після перепідключення - хабу повідомляємо один раз
+        if self.ipc and self.ipc.connected and not self._ipc_announced:
+            self._ipc_announced = True
+            await self.ipc.ready()
+    
+    def cluster_stats(self):
+        """Статистика цього процесу для хаба кластера"""
+        music = self.get_cog('Music')
+        return {
+            "guilds": len(self.guilds),
+            **(music.registry_gauges() if music else {"voice": len(self.voice_clients), "memory": memory_rss()}),
+            "latency": {str(shard_id): shard.latency for shard_id, shard in self.shards.items()},
+            "updated_at": time.time(),
+        }
+    
+    async def _ipc_stats_loop(self):
+        await self.wait_until_ready()
+        while not self.is_closed() and self.ipc.connected:
+            try:
+                await self.ipc.send_stats(self.cluster_stats())
+            except Exception as e:
+                logger.error(f"Помилка відправки статистики кластера: {e}")
+            await asyncio.sleep(Config.CLUSTER_STATS_INTERVAL)
+    
+    async def _ipc_shutdown(self, args):
+        logger.info("Хаб кластера запросив зупинку")
+        await self.close()
+    
+    async def _ipc_presence(self, args):
+        activity = discord.Activity(type=discord.ActivityType.listening, name=args["text"])
+        await self.change_presence(activity=activity)
+    
+    async def close(self):
+        await super().close()
+        if self.ipc:
+            await self.ipc.close()
 
     async def on_command_error(self, ctx, error):
         """Обробник помилок команд"""
@@ -112,7 +183,7 @@ def main():
         logger.error("DISCORD_TOKEN не знайдено! Перевірте змінні середовища.")
         sys.exit(1)
     
-    bot = MusicBot()
+    bot = MusicBot(shard_ids=Config.SHARD_IDS, shard_count=Config.SHARD_COUNT)
     
     try:
         bot.run(Config.TOKEN, reconnect=True)
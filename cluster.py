@@ -0,0 +1,192 @@
+"""Запуск бота кластером: кілька процесів, кожен зі своїм діапазоном шардів.
+
+    python cluster.py
+
+Процеси-воркери - звичайний bot.py з SHARD_IDS/SHARD_COUNT/CLUSTER_ID у
+середовищі. Зв'язок з ними - Unix-сокет CLUSTER_SOCKET (utils/ipc.py).
+SIGHUP - послідовний перезапуск воркерів, SIGINT/SIGTERM - зупинка.
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+
+from config import Config
+from utils.ipc import IPCServer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('MusicBot')
+
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py')
+GATEWAY_URL = 'https://discord.com/api/v10/gateway/bot'
+RESTART_DELAY = 5  # секунди перед перезапуском воркера після падіння
+
+
+async def recommended_shards():
+    """Рекомендована Discord кількість шардів"""
+    headers = {'Authorization': f'Bot {Config.TOKEN}'}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data['shards']
+
+
+def split_shards(shard_count, cluster_count):
+    """Розбиває шарди 0..shard_count-1 на суцільні діапазони"""
+    cluster_count = max(1, min(cluster_count, shard_count))
+    size, extra = divmod(shard_count, cluster_count)
+    clusters, start = [], 0
+    for index in range(cluster_count):
+        end = start + size + (1 if index < extra else 0)
+        clusters.append(list(range(start, end)))
+        start = end
+    return clusters
+
+
+class ClusterLauncher:
+    def __init__(self, shard_count, cluster_count):
+        self.shard_count = shard_count
+        self.clusters = split_shards(shard_count, cluster_count)
+        self.processes = {}  # cluster_id -> asyncio.subprocess.Process
+        self.started_at = {}  # cluster_id -> час запуску процесу
+        self.server = IPCServer(Config.CLUSTER_SOCKET)
+        self.server.handlers["cluster_stats"] = self.cluster_stats
+        self.server.handlers["restart"] = self.request_restart
+        self._stopping = False
+        self._restart_lock = asyncio.Lock()
+        self._supervisors = []
+
+    def worker_env(self, cluster_id):
+        env = os.environ.copy()
+        session_root, session_ext = os.path.splitext(Config.SESSION_PATH)
+        trace_root, trace_ext = os.path.splitext(Config.TRACE_PATH)
+        env.update({
+            'CLUSTER_ID': str(cluster_id),
+            'CLUSTER_SOCKET': Config.CLUSTER_SOCKET,
+            'SHARD_IDS': ','.join(map(str, self.clusters[cluster_id])),
+            'SHARD_COUNT': str(self.shard_count),
+            # У кожного процесу свій файл сесії - інакше воркери перезапишуть знімки один одного
+            'SESSION_PATH': f"{session_root}-{cluster_id}{session_ext}",
+            'TRACE_PATH': f"{trace_root}-{cluster_id}{trace_ext}",
+        })
+        return env
+
+    async def start_worker(self, cluster_id):
+        self.server.ready_event(cluster_id).clear()
+        process = await asyncio.create_subprocess_exec(sys.executable, BOT_SCRIPT, env=self.worker_env(cluster_id))
+        self.processes[cluster_id] = process
+        self.started_at[cluster_id] = time.time()
+        shards = self.clusters[cluster_id]
+        logger.info(f"Кластер {cluster_id}: PID {process.pid}, шарди {shards[0]}-{shards[-1]}")
+        return process
+
+    async def wait_ready(self, cluster_id):
+        try:
+            await asyncio.wait_for(self.server.ready_event(cluster_id).wait(), Config.CLUSTER_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Кластер {cluster_id} не став готовим за {Config.CLUSTER_READY_TIMEOUT} с")
+
+    async def supervise(self, cluster_id):
+        """Тримає воркер запущеним: перезапуск після завершення процесу"""
+        process = self.processes[cluster_id]
+        while True:
+            code = await process.wait()
+            if self._stopping:
+                return
+            if code != 0:
+                logger.error(f"Кластер {cluster_id} завершився з кодом {code}, перезапуск через {RESTART_DELAY} с")
+                await asyncio.sleep(RESTART_DELAY)
+            process = await self.start_worker(cluster_id)
+
+    async def cluster_stats(self, cluster_id, args):
+        stats = {}
+        for index, shards in enumerate(self.clusters):
+            process = self.processes.get(index)
+            stats[str(index)] = {
+                "shards": [shards[0], shards[-1]],
+                "pid": process.pid if process else None,
+                "online": index in self.server.clients,
+                "uptime": time.time() - self.started_at[index] if index in self.started_at else None,
+                **self.server.stats.get(index, {}),
+            }
+        return stats
+
+    async def request_restart(self, cluster_id, args):
+        if self._restart_lock.locked():
+            return {"started": False}
+        asyncio.create_task(self.rolling_restart())
+        return {"started": True}
+
+    async def rolling_restart(self):
+        """Перезапуск по одному кластеру, щоб решта шардів продовжувала грати"""
+        async with self._restart_lock:
+            logger.info("Послідовний перезапуск кластерів")
+            for cluster_id in range(len(self.clusters)):
+                process = self.processes[cluster_id]
+                if not await self.server.send(cluster_id, "shutdown"):
+                    process.terminate()
+                await process.wait()
+                # Новий процес запускає supervise; чекаємо, поки він підключиться до Discord
+                await self.wait_ready(cluster_id)
+            logger.info("Усі кластери перезапущено")
+
+    async def stop(self):
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Зупинка кластерів")
+        await self.server.broadcast("shutdown")
+        for process in self.processes.values():
+            try:
+                await asyncio.wait_for(process.wait(), 30)
+            except asyncio.TimeoutError:
+                process.kill()
+        for task in self._supervisors:
+            task.cancel()
+
+    async def run(self):
+        await self.server.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(self.stop()))
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.create_task(self.rolling_restart()))
+
+        # Запускаємо по черзі: Discord обмежує частоту підключення шардів
+        for cluster_id in range(len(self.clusters)):
+            await self.start_worker(cluster_id)
+            self._supervisors.append(asyncio.create_task(self.supervise(cluster_id)))
+            await self.wait_ready(cluster_id)
+        logger.info(f"Запущено {len(self.clusters)} кластерів, {self.shard_count} шардів")
+
+        await asyncio.gather(*self._supervisors, return_exceptions=True)
+        await self.server.close()
+
+
+async def run_cluster():
+    shard_count = Config.SHARD_COUNT or await recommended_shards()
+    launcher = ClusterLauncher(shard_count, Config.CLUSTER_COUNT)
+    await launcher.run()
+
+
+def main():
+    if not Config.TOKEN:
+        logger.error("DISCORD_TOKEN не знайдено! Перевірте змінні середовища.")
+        sys.exit(1)
+
+    try:
+        asyncio.run(run_cluster())
+    except aiohttp.ClientResponseError as e:
+        logger.error(f"Не вдалось отримати кількість шардів: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import asyncio
+import math
+import random
 import re
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import aclosing
+from itertools import chain, count, islice
 import logging
 from typing import Optional
 from urllib.parse import urlparse
@@ -8,29 +14,88 @@ import discord
 import wavelink
 from discord import app_commands
 from discord.ext import commands
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
 
 from config import Config
+from utils.cache import SingleFlight, TTLCache
+from utils.debounce import Debouncer
+from utils.matching import pick_best
+from utils.metrics import Counter as MetricCounter, ErrorCounterHandler, Gauge, Histogram, MetricsServer
+from utils.nodes import NodeBalancer, build_identifier, parse_nodes
+from utils.outbox import PRIORITY_BACKGROUND, PRIORITY_REPLY, PRIORITY_UPDATE, Outbox
+from utils.reconnect import ReconnectScheduler
+from utils.seqlist import ChunkedList
+from utils.session import SessionStore
+from utils.spotify import SpotifyClient, build_search_query, parse_spotify_url
+from utils.system import memory_rss
+from utils.timers import TimerHeap
+from utils.track_index import TrackIndex
+from utils.tracing import Tracer, span
+from utils.tracks import PendingTrack, TrackRecord, track_from_dict
 
 logger = logging.getLogger('MusicBot')
 
 URL_REGEX = re.compile(r'https?://(?:www\.)?.+')
 
 class MusicQueue:
-    def __init__(self):
-        self._queue = []
-        self.position = 0
+    """Черга відтворення.
+    
+    Зіграні треки лежать в обмеженому кільцевому буфері історії, поточний
+    і наступні - в ChunkedList (швидкі вставка/видалення/перехід за позицією).
+    position - наскрізний індекс: спершу історія, потім поточний і наступні.
+    """
+    def __init__(self, history_size=None):
+        self._history = deque(maxlen=history_size or Config.QUEUE_HISTORY_SIZE)
+        self._items = ChunkedList()  # поточний + наступні треки
+        self._cursor = -1  # індекс поточного треку в _items (-1 - ще нічого не грало)
         self.loop_mode = "off"  # off, track, queue
-        
+        self.version = 0  # зростає при кожній зміні складу черги (див. Music.snapshot_player)
+    
+    def __len__(self):
+        return len(self._history) + len(self._items)
+    
+    def __iter__(self):
+        return chain(self._history, self._items)
+    
+    def _get(self, index):
+        history = len(self._history)
+        if index < history:
+            return self._history[index]
+        return self._items[index - history]
+    
+    @property
+    def position(self):
+        return len(self._history) + self._cursor
+    
+    @position.setter
+    def position(self, value):
+        # Повертаємось в історію - переносимо зіграні треки назад у чергу
+        while self._history and len(self._history) > max(value, 0):
+            self._items.insert(0, self._history.pop())
+        self._cursor = value - len(self._history)
+    
+    def _release_history(self):
+        """Переносить зіграні треки в буфер історії (найстаріші витісняються)"""
+        # При повторі черги всі треки мають лишитись
+        if self.loop_mode == "queue":
+            return
+        while self._cursor > 0:
+            self._history.append(self._items.pop(0))
+            self._cursor -= 1
+            self.version += 1
+    
     @property
     def is_empty(self):
-        return len(self._queue) == 0
+        return len(self) == 0
+    
+    @property
+    def free_slots(self):
+        """Скільки ще треків можна додати: MAX_QUEUE_SIZE обмежує поточний і наступні, історія не рахується"""
+        return max(Config.MAX_QUEUE_SIZE - len(self._items), 0)
     
     @property
     def current_track(self):
-        if 0 <= self.position < len(self._queue):
-            return self._queue[self.position]
+        if 0 <= self.position < len(self):
+            return self._get(self.position)
         return None
     
     @property
@@ -39,20 +104,77 @@ class MusicQueue:
             return self.current_track
         
         next_pos = self.position + 1
-        if next_pos >= len(self._queue):
+        if next_pos >= len(self):
             if self.loop_mode == "queue":
                 next_pos = 0
             else:
                 return None
         
-        if 0 <= next_pos < len(self._queue):
-            return self._queue[next_pos]
+        if 0 <= next_pos < len(self):
+            return self._get(next_pos)
         return None
     
+    def advance(self, repeat=True):
+        """Переходить до наступного треку і повертає його.
+        
+        repeat=False - трек пропущено вручну, тож режим повтору треку не застосовується
+        """
+        if repeat and self.loop_mode == "track" and self.current_track is not None:
+            return self.current_track
+        
+        next_pos = self.position + 1
+        if next_pos >= len(self):
+            if self.loop_mode == "queue" and len(self):
+                next_pos = 0
+            else:
+                return None
+        
+        self.position = next_pos
+        self._release_history()
+        return self.current_track
+    
+    def upcoming(self, count):
+        """Наступні count треків після поточного (з урахуванням повтору черги)"""
+        tracks = []
+        size = len(self)
+        for offset in range(1, min(count, size) + 1):
+            pos = self.position + offset
+            if pos >= size:
+                if self.loop_mode != "queue":
+                    break
+                pos %= size
+            tracks.append(self._get(pos))
+        return tracks
+    
+    @staticmethod
+    def _compact(track):
+        """Повні треки wavelink зберігаємо в черзі як компактні TrackRecord"""
+        if isinstance(track, (TrackRecord, PendingTrack)):
+            return track
+        return TrackRecord.from_playable(track)
+    
+    def replace(self, old, new):
+        """Замінює елемент черги (за ідентичністю), пошук починається з поточної позиції"""
+        index = self._items.find(old, max(self._cursor, 0))
+        if index < 0:
+            index = self._items.find(old)
+        if index >= 0:
+            self._items[index] = self._compact(new)
+            self.version += 1
+            return True
+        # Заглушка могла піти в історію до завершення пошуку (напр. після jump)
+        for index, item in enumerate(self._history):
+            if item is old:
+                self._history[index] = self._compact(new)
+                self.version += 1
+                return True
+        return False
+    
     def add(self, track):
-        if len(self._queue) >= Config.MAX_QUEUE_SIZE:
+        if not self.free_slots:
             return False
-        self._queue.append(track)
+        self._items.append(self._compact(track))
+        self.version += 1
         return True
     
     def add_many(self, tracks):
@@ -62,25 +184,48 @@ class MusicQueue:
                 added += 1
         return added
     
+    def insert(self, index, track):
+        """Вставляє трек на наскрізну позицію index (не раніше поточного треку)"""
+        if not self.free_slots:
+            return False
+        item_index = max(index - len(self._history), 0)
+        self._items.insert(item_index, self._compact(track))
+        if item_index <= self._cursor:
+            self._cursor += 1
+        self.version += 1
+        return True
+    
     def remove(self, index):
-        if 0 <= index < len(self._queue):
-            removed = self._queue.pop(index)
-            if index <= self.position and self.position > 0:
-                self.position -= 1
-            return removed
-        return None
+        if not 0 <= index < len(self):
+            return None
+        
+        history = len(self._history)
+        if index < history:
+            removed = self._history[index]
+            del self._history[index]
+        else:
+            item_index = index - history
+            removed = self._items.pop(item_index)
+            # Видалення поточного треку теж зсуває позицію, щоб наступним
+            # заграв трек, що став на його місце
+            if item_index <= self._cursor:
+                self._cursor -= 1
+        self.version += 1
+        return removed
     
     def clear(self):
-        self._queue.clear()
-        self.position = 0
+        self._history.clear()
+        self._items.clear()
+        self._cursor = -1
+        self.version += 1
         
     def skip(self, count=1):
         self.position += count - 1
-        if self.position >= len(self._queue):
+        if self.position >= len(self):
             if self.loop_mode == "queue":
                 self.position = 0
             else:
-                self.position = len(self._queue)
+                self.position = len(self)
     
     def previous(self):
         if self.position > 0:
@@ -89,38 +234,87 @@ class MusicQueue:
         return False
     
     def shuffle(self):
-        import random
-        current = self.current_track
-        remaining = self._queue[self.position + 1:]
-        random.shuffle(remaining)
-        self._queue = self._queue[:self.position + 1] + remaining
+        """Перемішує на місці лише треки після поточного"""
+        self._items.shuffle(self._cursor + 1)
+        self.version += 1
     
     def get_queue_list(self, start=0, limit=10):
-        end = min(start + limit, len(self._queue))
-        return self._queue[start:end], len(self._queue)
+        total = len(self)
+        end = min(start + limit, total)
+        history = len(self._history)
+        tracks = list(islice(self._history, start, min(end, history))) if start < history else []
+        tracks += self._items.slice(max(start - history, 0), end - history)
+        return tracks, total
     
     def jump(self, position):
-        if 0 <= position < len(self._queue):
+        if 0 <= position < len(self):
             self.position = position - 1
             return True
         return False
 
 
+# Метрики гарячих шляхів (див. Config.METRICS_PORT)
+SEARCH_LATENCY = Histogram("music_search_seconds", "Час search_tracks", ["source"])
+LAVALINK_LOAD_LATENCY = Histogram("music_lavalink_load_seconds", "Час завантаження треків з Lavalink", ["source"])
+PLAY_NEXT_LATENCY = Histogram("music_play_next_seconds", "Час play_next")
+VOICE_CONNECT_LATENCY = Histogram("music_voice_connect_seconds", "Час підключення до голосового каналу")
+CONTROLS_LATENCY = Histogram("music_controls_update_seconds", "Час оновлення панелі керування", ["action"])
+COMMAND_LATENCY = Histogram("music_command_seconds", "Час виконання команд", ["command"])
+COMMANDS_TOTAL = MetricCounter("music_commands_total", "Виконані команди", ["command", "status"])
+ERRORS_TOTAL = MetricCounter("music_errors_total", "Помилки в логах", ["module", "function"])
+LOOP_LAG = Histogram("music_event_loop_lag_seconds", "Затримка event loop",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+
+def query_source(query: str) -> str:
+    """Джерело запиту для міток метрик"""
+    if "spotify.com" in query:
+        return "spotify"
+    if "soundcloud.com" in query or query.startswith("scsearch:"):
+        return "soundcloud"
+    return "youtube"
+
+
+def shard_id_for(bot, guild_id) -> int:
+    """Номер шарда, що обслуговує сервер (формула Discord)"""
+    return (guild_id >> 22) % (bot.shard_count or 1)
+
+
+def get_wavelink_player(bot, guild_id) -> Optional[wavelink.Player]:
+    """Плеєр wavelink сервера (на будь-якому з вузлів) або None"""
+    guild = bot.get_guild(guild_id)
+    if guild and isinstance(guild.voice_client, wavelink.Player):
+        return guild.voice_client
+    return None
+
+
 class MusicPlayer:
     def __init__(self, bot, guild_id):
         self.bot = bot
         self.guild_id = guild_id
+        self.shard_id = shard_id_for(bot, guild_id)
         self.queue = MusicQueue()
         self.volume = Config.DEFAULT_VOLUME
         self.text_channel = None
         self._destroyed = False
         self._24_7_mode = False
         self._voice_channel_id = None
-        self._last_activity = None
+        self._last_activity = time.monotonic()
+        self._migrating = False  # плеєр переноситься на інший вузол
+        self._pending_loads = 0  # кількість плейлистів, що ще завантажуються
+        self._queue_snapshot = None  # (версія черги, треки для знімка сесії)
         
+    def touch(self):
+        self._last_activity = time.monotonic()
+    
+    @property
+    def idle_for(self):
+        """Секунди від останньої команди чи події"""
+        return time.monotonic() - self._last_activity
+    
     async def destroy(self):
         self._destroyed = True
-        player = wavelink.Pool.get_node().get_player(self.guild_id)
+        player = get_wavelink_player(self.bot, self.guild_id)
         if player:
             await player.disconnect()
 
@@ -177,20 +371,30 @@ class SongSelectView(discord.ui.View):
 
 
 class MusicControlsView(discord.ui.View):
-    """View з кнопками керування музикою"""
-    def __init__(self, music_cog, guild_id, timeout=None):
-        super().__init__(timeout=timeout)
+    """Постійний View з кнопками керування музикою.
+
+    Один екземпляр на весь бот (bot.add_view): стану не зберігає, сервер
+    береться з interaction, тож кнопки працюють і після перезапуску.
+    """
+    def __init__(self, music_cog):
+        super().__init__(timeout=None)
         self.music_cog = music_cog
-        self.guild_id = guild_id
-        self.message = None
     
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Перевірка чи користувач у голосовому каналі"""
-        player = wavelink.Pool.get_node().get_player(self.guild_id)
+        if interaction.guild_id is None:
+            await interaction.response.send_message("❌ Кнопки керування працюють лише на сервері!", ephemeral=True)
+            return False
+        self.music_cog.touch(interaction.guild_id)
+        player = self.music_cog.get_wavelink_player(interaction.guild_id)
         if not player:
             await interaction.response.send_message("❌ Бот не у голосовому каналі!", ephemeral=True)
             return False
         
+        if interaction.guild_id not in self.music_cog.players:
+            await interaction.response.send_message("❌ Ця панель застаріла - почніть відтворення знову (!play)", ephemeral=True)
+            return False
+        
         if not interaction.user.voice or interaction.user.voice.channel != player.channel:
             await interaction.response.send_message("❌ Ви маєте бути у тому ж голосовому каналі!", ephemeral=True)
             return False
@@ -200,10 +404,10 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="⏮️", style=discord.ButtonStyle.secondary, custom_id="prev_btn")
     async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        music_player = self.music_cog.get_player(self.guild_id)
+        music_player = self.music_cog.get_player(interaction.guild_id)
         
         if music_player.queue.previous():
-            player = wavelink.Pool.get_node().get_player(self.guild_id)
+            player = self.music_cog.get_wavelink_player(interaction.guild_id)
             if player:
                 await player.skip()
             await interaction.followup.send("⏮️ Попередній трек!", ephemeral=True)
@@ -213,7 +417,7 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="⏯️", style=discord.ButtonStyle.primary, custom_id="play_pause_btn")
     async def play_pause_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        player = wavelink.Pool.get_node().get_player(self.guild_id)
+        player = self.music_cog.get_wavelink_player(interaction.guild_id)
         
         if player.paused:
             await player.pause(False)
@@ -225,7 +429,7 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="⏭️", style=discord.ButtonStyle.secondary, custom_id="skip_btn")
     async def skip_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        player = wavelink.Pool.get_node().get_player(self.guild_id)
+        player = self.music_cog.get_wavelink_player(interaction.guild_id)
         
         if player and player.playing:
             await player.skip()
@@ -236,7 +440,7 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="🔁", style=discord.ButtonStyle.secondary, custom_id="loop_btn")
     async def loop_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        music_player = self.music_cog.get_player(self.guild_id)
+        music_player = self.music_cog.get_player(interaction.guild_id)
         
         modes = ["off", "track", "queue"]
         current_idx = modes.index(music_player.queue.loop_mode)
@@ -249,7 +453,7 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="🔀", style=discord.ButtonStyle.secondary, custom_id="shuffle_btn")
     async def shuffle_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        music_player = self.music_cog.get_player(self.guild_id)
+        music_player = self.music_cog.get_player(interaction.guild_id)
         
         if music_player.queue.is_empty:
             await interaction.followup.send("❌ Черга порожня!", ephemeral=True)
@@ -261,23 +465,24 @@ class MusicControlsView(discord.ui.View):
     @discord.ui.button(label="⏹️", style=discord.ButtonStyle.danger, custom_id="stop_btn")
     async def stop_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        player = wavelink.Pool.get_node().get_player(self.guild_id)
+        player = self.music_cog.get_wavelink_player(interaction.guild_id)
         
         if player:
-            music_player = self.music_cog.get_player(self.guild_id)
+            music_player = self.music_cog.get_player(interaction.guild_id)
             music_player.queue.clear()
+            music_player._24_7_mode = False  # Вимикаємо 24/7 при зупинці
             await player.stop()
             await player.disconnect()
             
-            if self.guild_id in self.music_cog.players:
-                del self.music_cog.players[self.guild_id]
+            # Видаляємо плеєр і панель
+            self.music_cog.remove_player(interaction.guild_id)
             
             await interaction.followup.send("⏹️ Музику зупинено!", ephemeral=True)
     
     @discord.ui.button(label="📋", style=discord.ButtonStyle.secondary, custom_id="queue_btn")
     async def queue_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.defer()
-        music_player = self.music_cog.get_player(self.guild_id)
+        music_player = self.music_cog.get_player(interaction.guild_id)
         
         if music_player.queue.is_empty:
             await interaction.followup.send("❌ Черга порожня!", ephemeral=True)
@@ -307,80 +512,724 @@ class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.players = {}
+        self.shard_players = defaultdict(set)  # shard_id -> guild_id плеєрів цього шарда
         self.spotify = None
-        self.control_views = {}  # guild_id -> MusicControlsView
+        self.control_messages = {}  # guild_id -> повідомлення з панеллю керування
+        self.controls_view = MusicControlsView(self)
+        bot.add_view(self.controls_view)  # один постійний View для всіх серверів
+        self.controls_updater = Debouncer(Config.NOW_PLAYING_DEBOUNCE)
+        self._not_found = defaultdict(list)  # guild_id -> треки, які не вдалось знайти
+        self.not_found_reports = Debouncer(Config.NOT_FOUND_REPORT_DELAY)
+        self._messages_since = {}  # channel_id -> повідомлень після панелі керування
+        self.rest_stats = Counter()  # запити до Discord з панеллю керування
+        self.outbox = Outbox(rate=Config.OUTBOX_RATE, per=Config.OUTBOX_PER, max_depth=Config.OUTBOX_MAX_DEPTH)
+        self._progress_sent = {}  # guild_id -> час останнього оновлення прогресу
+        self._progress_cursor = 0  # з якого сервера почати наступний прохід
+        self.search_cache = TTLCache(maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL)
+        self.search_flights = SingleFlight()
+        self.track_index = TrackIndex(Config.TRACK_INDEX_PATH, max_age=Config.TRACK_INDEX_MAX_AGE)
+        self._index_prefetch = TTLCache(maxsize=4096, ttl=300)  # результати пакетних запитів до індексу
+        self._revalidating = set()  # Spotify ID, що зараз оновлюються у фоні
+        self._background_tasks = set()
+        self.node_configs = parse_nodes(Config.LAVALINK_NODES, {
+            "identifier": "main",
+            "uri": f"{'https' if Config.LAVALINK_SSL else 'http'}://{Config.LAVALINK_HOST}:{Config.LAVALINK_PORT}",
+            "password": Config.LAVALINK_PASSWORD,
+            "regions": []
+        })
+        self.node_balancer = NodeBalancer(self.node_configs)
+        
+        # Збережена сесія попереднього запуску
+        self.session_store = SessionStore(Config.SESSION_PATH)
+        self._saved_session = self.session_store.load()
+        for node in self.node_configs:
+            node["session_id"] = self._saved_session["nodes"].get(node["identifier"])
+        self._failing_nodes = set()  # вузли, з яких зараз переносяться плеєри
+        self.timers = TimerHeap()  # відкладені перепідключення 24/7
+        self.reconnects = ReconnectScheduler(
+            concurrency=Config.RECONNECT_CONCURRENCY,
+            rate=Config.RECONNECT_RATE,
+            jitter=Config.RECONNECT_JITTER
+        )
+        self._reconnect_attempts = {}  # guild_id -> кількість невдалих спроб
+        self.failover_stats = {"count": 0, "players": 0, "failed": 0, "last_duration": None}
         
         # Ініціалізація Spotify
         if Config.SPOTIFY_CLIENT_ID and Config.SPOTIFY_CLIENT_SECRET:
             try:
-                self.spotify = spotipy.Spotify(
-                    auth_manager=SpotifyClientCredentials(
-                        client_id=Config.SPOTIFY_CLIENT_ID,
-                        client_secret=Config.SPOTIFY_CLIENT_SECRET
-                    )
+                self.spotify = SpotifyClient(
+                    Config.SPOTIFY_CLIENT_ID,
+                    Config.SPOTIFY_CLIENT_SECRET,
+                    max_workers=Config.SPOTIFY_MAX_WORKERS,
+                    timeout=Config.SPOTIFY_TIMEOUT
                 )
                 logger.info("Spotify API ініціалізовано")
             except Exception as e:
                 logger.error(f"Помилка ініціалізації Spotify: {e}")
         
+        # Відкриваємо індекс Spotify -> Lavalink
+        bot.loop.create_task(self.open_track_index())
+        
         # Запускаємо підключення до Lavalink
         bot.loop.create_task(self.connect_nodes())
         
-        # Запускаємо перевірку 24/7 режиму
-        bot.loop.create_task(self._24_7_checker())
+        # Стежимо за станом вузлів для автоматичного перенесення плеєрів
+        bot.loop.create_task(self._node_watchdog())
+        
+        # Перепідключення 24/7 - за подіями голосу, шардів і вузлів, через таймери
+        self.timers.start()
+        self.reconnects.start()
+        
+        # Метрики: лічильник помилок працює завжди, HTTP-сервер - лише якщо задано порт
+        self.error_counter = ErrorCounterHandler(ERRORS_TOTAL)
+        logger.addHandler(self.error_counter)
+        self.gauges = self.create_gauges()
+        self.metrics_server = None
+        if Config.METRICS_PORT:
+            self.create_background_task(self.start_metrics())
+        self.tracer = Tracer(Config.TRACE_PATH, enabled=Config.TRACE_ENABLED,
+                             slow_ms=Config.TRACE_SLOW_MS, sample_rate=Config.TRACE_SAMPLE_RATE)
+        self.reaped = {"players": 0, "disconnects": 0}
+        self.timers.schedule("reaper", Config.REAPER_INTERVAL, self._reaper)
+        self.timers.schedule("progress", Config.PROGRESS_TICK, self._progress_tick)
+    
+    async def cog_unload(self):
+        # Останній знімок перед вимкненням - плеєри ще підключені
+        try:
+            await self.save_session()
+        except Exception as e:
+            logger.error(f"Не вдалось зберегти сесію: {e}")
+        
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.timers.close()
+        self.controls_view.stop()
+        await self.controls_updater.close()
+        await self.not_found_reports.close()
+        await self.outbox.close()
+        logger.removeHandler(self.error_counter)
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.tracer.close()
+        await self.reconnects.close()
+        if self.spotify:
+            self.spotify.close()
+        await self.track_index.close()
+    
+    async def start_metrics(self):
+        port = Config.METRICS_PORT + (Config.CLUSTER_ID or 0)
+        self.metrics_server = MetricsServer(Config.METRICS_HOST, port)
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            logger.error(f"Не вдалось запустити сервер метрик на порту {port}: {e}")
+            self.metrics_server = None
+            return
+        await self._loop_lag_monitor()
+    
+    async def _loop_lag_monitor(self):
+        """Наскільки пізніше за план прокидається sleep - затримка event loop"""
+        interval = Config.LOOP_LAG_INTERVAL
+        while not self.bot.is_closed():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            LOOP_LAG.observe(lag)
+            self._loop_lag = lag
+    
+    def create_gauges(self):
+        """Значення, що обчислюються в момент збору метрик"""
+        self._loop_lag = 0.0
+        
+        def queue_lengths():
+            lengths = [len(music_player.queue) for music_player in self.players.values()]
+            return [(("total",), sum(lengths)), (("max",), max(lengths, default=0))]
+        
+        def node_stats():
+            values = []
+            for identifier, stats in self.node_balancer.stats.items():
+                values += [
+                    ((identifier, "players"), stats.players),
+                    ((identifier, "playing"), stats.playing),
+                    ((identifier, "system_load"), stats.system_load),
+                    ((identifier, "lavalink_load"), stats.lavalink_load),
+                    ((identifier, "frames_deficit"), stats.frames_deficit),
+                    ((identifier, "frames_nulled"), stats.frames_nulled),
+                    ((identifier, "ping_ms"), stats.ping or 0),
+                    ((identifier, "failures"), stats.failures),
+                ]
+            for node in self.node_balancer.available_nodes():
+                values.append(((node.identifier, "penalty"), self.node_balancer.penalty(node)))
+            return values
+        
+        def registry():
+            gauges = self.registry_gauges()
+            return [((name,), value) for name, value in gauges.items() if value is not None]
+        
+        def cache_stats():
+            search = self.search_cache.stats()
+            prefetch = self._index_prefetch.stats()
+            index = self.track_index.stats()
+            return [
+                (("search", "hit"), search["hits"]),
+                (("search", "miss"), search["misses"]),
+                (("search", "eviction"), search["evictions"]),
+                (("search", "shared"), self.search_flights.shared),
+                (("index_prefetch", "hit"), prefetch["hits"]),
+                (("index_prefetch", "miss"), prefetch["misses"]),
+                (("track_index", "hit"), index["hits"]),
+                (("track_index", "miss"), index["misses"]),
+            ]
+        
+        def queues():
+            outbox = self.outbox.stats()
+            reconnects = self.reconnects.stats()
+            return [
+                (("outbox",), outbox["depth"]),
+                (("reconnect",), reconnects["queued"] + reconnects["in_flight"]),
+                (("controls_pending",), len(self.controls_updater)),
+            ]
+        
+        return [
+            Gauge("music_registry", "Плеєри, голосові підключення, панелі, пам'ять", ["kind"], callback=registry),
+            Gauge("music_queue_tracks", "Треків у чергах", ["kind"], callback=queue_lengths),
+            Gauge("music_node_stat", "Показники вузлів Lavalink", ["node", "stat"], callback=node_stats),
+            Gauge("music_pending", "Глибина внутрішніх черг", ["queue"], callback=queues),
+            Gauge("music_event_loop_lag_last_seconds", "Остання виміряна затримка event loop",
+                  callback=lambda: [((), self._loop_lag)]),
+            Gauge("music_outbox_wait_seconds_total", "Сумарне очікування лімітів Discord",
+                  callback=lambda: [((), self.outbox.wait_time)]),
+            Gauge("music_cache_events_total", "Звернення до кешу пошуку та індексу треків", ["cache", "result"],
+                  callback=cache_stats),
+        ]
+    
+    async def open_track_index(self):
+        try:
+            await self.track_index.open()
+        except Exception as e:
+            logger.error(f"Помилка відкриття індексу треків: {e}")
+    
+    def create_background_task(self, coro):
+        """Фонова задача, на яку тримаємо посилання до завершення"""
+        task = self.bot.loop.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
     
     async def connect_nodes(self):
         await self.bot.wait_until_ready()
         
         try:
-            node = wavelink.Node(
-                uri=f"{'https' if Config.LAVALINK_SSL else 'http'}://{Config.LAVALINK_HOST}:{Config.LAVALINK_PORT}",
-                password=Config.LAVALINK_PASSWORD
-            )
-            await wavelink.Pool.connect(client=self.bot, nodes=[node])
-            logger.info(f"Підключено до Lavalink: {Config.LAVALINK_HOST}")
+            nodes = self.node_balancer.create_nodes(self.node_configs, resume_timeout=Config.LAVALINK_RESUME_TIMEOUT)
+            await wavelink.Pool.connect(client=self.bot, nodes=nodes)
+            logger.info(f"Підключено до Lavalink: {', '.join(node['identifier'] for node in self.node_configs)}")
         except Exception as e:
             logger.error(f"Помилка підключення до Lavalink: {e}")
+            return
+        
+        # Відновлюємо плеєри попереднього запуску і починаємо зберігати знімки
+        await self.restore_session()
+        self.create_background_task(self._snapshot_loop())
+        
+        # Періодично оновлюємо навантаження вузлів
+        while not self.bot.is_closed():
+            try:
+                await self.node_balancer.refresh()
+            except Exception as e:
+                logger.error(f"Помилка оновлення статистики вузлів: {e}")
+            await asyncio.sleep(Config.NODE_STATS_INTERVAL)
+    
+    def get_wavelink_player(self, guild_id) -> Optional[wavelink.Player]:
+        return get_wavelink_player(self.bot, guild_id)
+    
+    async def connect_voice(self, voice_channel, exclude=()) -> wavelink.Player:
+        with VOICE_CONNECT_LATENCY.time(), span("voice.connect", channel_id=voice_channel.id):
+            return await voice_channel.connect(cls=self.create_wavelink_player(voice_channel, exclude=exclude))
+    
+    def create_wavelink_player(self, voice_channel, exclude=()):
+        """Плеєр на найменш навантаженому вузлі (з урахуванням регіону каналу)"""
+        node = self.node_balancer.best_node(region=getattr(voice_channel, 'rtc_region', None), exclude=exclude)
+        if node is None:
+            return wavelink.Player()
+        return wavelink.Player(nodes=[node])
+    
+    def snapshot_player(self, guild_id, music_player: MusicPlayer):
+        """Стан плеєра для відновлення після перезапуску (треки без повторного пошуку)"""
+        player = self.get_wavelink_player(guild_id)
+        channel_id = player.channel.id if player and player.channel else music_player._voice_channel_id
+        if not channel_id or (music_player.queue.is_empty and not music_player._24_7_mode):
+            return None
+        
+        # Треки серіалізуємо заново лише якщо черга змінилась від попереднього знімка
+        queue = music_player.queue
+        if music_player._queue_snapshot is None or music_player._queue_snapshot[0] != queue.version:
+            music_player._queue_snapshot = (queue.version, [track.to_dict() for track in queue])
+        
+        playing = bool(player and player.current)
+        return {
+            "guild_id": guild_id,
+            "voice_channel_id": channel_id,
+            "text_channel_id": music_player.text_channel.id if music_player.text_channel else None,
+            "queue": music_player._queue_snapshot[1],
+            "position": queue.position,
+            "loop_mode": queue.loop_mode,
+            "volume": music_player.volume,
+            "24_7": music_player._24_7_mode,
+            "playing": playing,
+            "paused": bool(player and player.paused),
+            "track_position": int(player.position) if playing else 0,
+            "saved_at": time.time(),
+        }
+    
+    async def save_session(self):
+        # JSON формується і пишеться у потоці (SessionStore.save), тут лише збираємо знімки
+        players = []
+        for guild_id, music_player in list(self.players.items()):
+            snapshot = self.snapshot_player(guild_id, music_player)
+            if snapshot:
+                players.append(snapshot)
+        
+        nodes = {node.identifier: node.session_id for node in wavelink.Pool.nodes.values() if node.session_id}
+        await self.session_store.save({"nodes": nodes, "players": players})
     
-    async def _24_7_checker(self):
-        """Перевірка та автоматичне перепідключення для 24/7 режиму"""
+    async def _snapshot_loop(self):
+        while not self.bot.is_closed():
+            await asyncio.sleep(Config.SESSION_SNAPSHOT_INTERVAL)
+            try:
+                await self.save_session()
+            except Exception as e:
+                logger.error(f"Помилка збереження сесії: {e}")
+    
+    async def restore_session(self):
+        """Відновлює плеєри зі знімка попереднього запуску (через чергу перепідключень)"""
+        snapshots = self._saved_session.get("players", [])
+        self._saved_session = None
+        
+        for snapshot in snapshots:
+            guild_id = snapshot.get("guild_id")
+            self.reconnects.submit(
+                ("restore", guild_id),
+                lambda snapshot=snapshot: self._restore_player_job(snapshot),
+                priority=self.listener_count(guild_id, snapshot.get("voice_channel_id"))
+            )
+        if snapshots:
+            logger.info(f"Відновлення {len(snapshots)} плеєрів заплановано")
+    
+    async def _restore_player_job(self, snapshot):
+        try:
+            return await self.restore_player(snapshot)
+        except Exception as e:
+            logger.error(f"Не вдалось відновити плеєр {snapshot.get('guild_id')}: {e}")
+            return False
+    
+    async def restore_player(self, snapshot):
+        guild = self.bot.get_guild(snapshot["guild_id"])
+        if not guild:
+            return False
+        channel = guild.get_channel(snapshot["voice_channel_id"])
+        if not channel or self.get_wavelink_player(guild.id):
+            return False
+        
+        music_player = self.get_player(guild.id)
+        queue = music_player.queue
+        queue.clear()
+        queue.add_many(track_from_dict(data) for data in snapshot["queue"])
+        queue.loop_mode = snapshot.get("loop_mode", "off")
+        queue.position = snapshot.get("position", -1)
+        music_player.volume = snapshot.get("volume", Config.DEFAULT_VOLUME)
+        music_player._24_7_mode = snapshot.get("24_7", False)
+        music_player._voice_channel_id = channel.id
+        if snapshot.get("text_channel_id"):
+            music_player.text_channel = guild.get_channel(snapshot["text_channel_id"])
+        
+        player = await self.connect_voice(channel)
+        
+        current = queue.current_track
+        if isinstance(current, PendingTrack):
+            current = await self.resolve_pending(music_player, current)
+        
+        if not snapshot.get("playing") or current is None:
+            await player.set_volume(music_player.volume)
+            return True
+        
+        # Позиція з урахуванням часу, поки бот був вимкнений
+        paused = snapshot.get("paused", False)
+        start = snapshot.get("track_position", 0)
+        if not paused:
+            start += int((time.time() - snapshot.get("saved_at", time.time())) * 1000)
+        
+        if current.length and not current.is_stream and start >= current.length:
+            # Трек мав уже закінчитись - граємо наступний
+            await player.set_volume(music_player.volume)
+            await self.play_next(player, repeat=False)
+            return True
+        
+        await player.play(current.to_playable(), start=start, volume=music_player.volume, paused=paused)
+        self.prefetch_ahead(music_player)
+        return True
+    
+    async def _node_watchdog(self):
+        """Помічає відключені вузли і переносить їх плеєри на робочі.
+        
+        Обрив з'єднання чи падіння вузла wavelink 3.0 не повідомляє подією - лише
+        змінює node.status (CONNECTING/DISCONNECTED), тож затримка виявлення реального
+        збою - до NODE_HEALTH_INTERVAL секунд.
+        """
         await self.bot.wait_until_ready()
         
         while not self.bot.is_closed():
             try:
-                for guild_id, music_player in list(self.players.items()):
-                    if music_player._24_7_mode and music_player._voice_channel_id:
-                        player = wavelink.Pool.get_node().get_player(guild_id)
-                        guild = self.bot.get_guild(guild_id)
-                        
-                        if guild and not player:
-                            # Бот відключився, але 24/7 увімкнено - перепідключаємось
-                            voice_channel = guild.get_channel(music_player._voice_channel_id)
-                            if voice_channel:
-                                try:
-                                    await voice_channel.connect(cls=wavelink.Player)
-                                    logger.info(f"24/7: Перепідключено до {voice_channel.name}")
-                                    
-                                    # Відновлюємо відтворення якщо була черга
-                                    if not music_player.queue.is_empty and music_player.queue.current_track:
-                                        new_player = wavelink.Pool.get_node().get_player(guild_id)
-                                        if new_player:
-                                            await new_player.play(music_player.queue.current_track)
-                                except Exception as e:
-                                    logger.error(f"24/7: Помилка перепідключення: {e}")
-                
-                await asyncio.sleep(30)  # Перевірка кожні 30 секунд
+                self.check_nodes(wavelink.Pool.nodes.values())
             except Exception as e:
-                logger.error(f"24/7 checker error: {e}")
-                await asyncio.sleep(30)
+                logger.error(f"Помилка перевірки вузлів: {e}")
+            await asyncio.sleep(Config.NODE_HEALTH_INTERVAL)
+    
+    def check_nodes(self, nodes):
+        """Запускає перенесення плеєрів з кожного непідключеного вузла (один раз на збій)"""
+        for node in list(nodes):
+            if node.status == wavelink.NodeStatus.CONNECTED:
+                self._failing_nodes.discard(node.identifier)
+            elif node.identifier not in self._failing_nodes and self.players_on_node(node.identifier):
+                self.create_background_task(self.handle_node_failure(node.identifier))
+    
+    @commands.Cog.listener()
+    async def on_wavelink_node_closed(self, node: wavelink.Node, disconnected):
+        """Вузол закрито явно (Node.close / Pool.close) - переносимо плеєри, не чекаючи перевірки.
+        
+        Лише для явного закриття: реальні збої помічає _node_watchdog.
+        """
+        if node.identifier not in self._failing_nodes:
+            await self.handle_node_failure(node.identifier)
+    
+    def players_on_node(self, identifier):
+        return [
+            player for player in self.bot.voice_clients
+            if isinstance(player, wavelink.Player) and player.node and player.node.identifier == identifier
+        ]
+    
+    async def handle_node_failure(self, identifier):
+        """Переносить усі плеєри з недоступного вузла на найкращі робочі"""
+        if identifier in self._failing_nodes:
+            return
+        
+        players = self.players_on_node(identifier)
+        if not players:
+            return
+        
+        if self.node_balancer.best_node(exclude={identifier}) is None:
+            # Переносити нікуди - чекаємо, поки вузол відновиться сам
+            logger.error(f"Вузол {identifier} недоступний, а інших робочих вузлів немає")
+            return
+        
+        self._failing_nodes.add(identifier)
+        started = time.perf_counter()
+        logger.warning(f"Вузол {identifier} недоступний, переносимо {len(players)} плеєрів")
+        
+        semaphore = asyncio.Semaphore(Config.FAILOVER_CONCURRENCY)
+        
+        async def migrate(player):
+            async with semaphore:
+                return await self.migrate_player(player, exclude={identifier})
+        
+        results = await asyncio.gather(*(migrate(player) for player in players), return_exceptions=True)
+        migrated = sum(1 for result in results if result is True)
+        duration = time.perf_counter() - started
+        
+        self.failover_stats["count"] += 1
+        self.failover_stats["players"] += migrated
+        self.failover_stats["failed"] += len(players) - migrated
+        self.failover_stats["last_duration"] = duration
+        logger.warning(f"Вузол {identifier}: перенесено {migrated}/{len(players)} плеєрів за {duration:.2f} с")
+    
+    async def migrate_player(self, player: wavelink.Player, exclude=()):
+        """Переносить плеєр на інший вузол зі збереженням треку, позиції, гучності та паузи"""
+        guild = player.guild
+        channel = player.channel
+        music_player = self.players.get(guild.id)
+        volume = music_player.volume if music_player else player.volume
+        paused = player.paused
+        
+        if music_player:
+            music_player._migrating = True
+        try:
+            track = player.current
+            position = int(player.position) if track else 0
+            if track is None and music_player:
+                track = await self.current_playable(music_player)
+            
+            # Старий вузол недоступний - прибираємо плеєр локально
+            try:
+                await asyncio.wait_for(player.disconnect(), timeout=5)
+            except Exception:
+                player.cleanup()
+            
+            new_player = await self.connect_voice(channel, exclude=exclude)
+            if track is not None:
+                await new_player.play(track, start=position, volume=volume, paused=paused)
+            else:
+                await new_player.set_volume(volume)
+            return True
+        except Exception as e:
+            logger.error(f"Не вдалось перенести плеєр {guild.id}: {e}")
+            if music_player and music_player._24_7_mode:
+                self.schedule_24_7(guild.id)
+            return False
+        finally:
+            if music_player:
+                music_player._migrating = False
+    
+    def needs_24_7_reconnect(self, guild_id) -> bool:
+        music_player = self.players.get(guild_id)
+        return bool(
+            music_player and music_player._24_7_mode and music_player._voice_channel_id
+            and not music_player._migrating and not self.get_wavelink_player(guild_id)
+        )
+    
+    def schedule_24_7(self, guild_id, delay=None):
+        """Планує перепідключення 24/7; наступні невдалі спроби - з експоненційною затримкою"""
+        if delay is None:
+            attempt = self._reconnect_attempts.get(guild_id, 0)
+            delay = min(Config.RECONNECT_MAX_DELAY, Config.RECONNECT_BASE_DELAY * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.0)  # розсіюємо одночасні спроби
+        self.timers.schedule(("24_7", guild_id), delay, lambda: self._reconnect_24_7_timer(guild_id))
+    
+    def cancel_24_7(self, guild_id):
+        self.timers.cancel(("24_7", guild_id))
+        self.reconnects.cancel(("24_7", guild_id))
+        self._reconnect_attempts.pop(guild_id, None)
+    
+    def listener_count(self, guild_id, channel_id) -> int:
+        """Кількість людей (не ботів) у голосовому каналі - пріоритет перепідключення"""
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(channel_id) if guild and channel_id else None
+        if channel is None:
+            return 0
+        return sum(1 for member in channel.members if not member.bot)
+    
+    def schedule_shard_24_7(self, shard_id):
+        for guild_id in list(self.shard_players.get(shard_id, ())):
+            if self.needs_24_7_reconnect(guild_id):
+                self.schedule_24_7(guild_id)
+    
+    async def _reconnect_24_7_timer(self, guild_id):
+        if not self.needs_24_7_reconnect(guild_id):
+            self._reconnect_attempts.pop(guild_id, None)
+            return
+        
+        # Саме перепідключення - через спільну чергу з обмеженням темпу
+        music_player = self.players[guild_id]
+        self.reconnects.submit(
+            ("24_7", guild_id),
+            lambda: self._reconnect_24_7_job(guild_id),
+            priority=self.listener_count(guild_id, music_player._voice_channel_id)
+        )
+    
+    async def _reconnect_24_7_job(self, guild_id):
+        if not self.needs_24_7_reconnect(guild_id):
+            self._reconnect_attempts.pop(guild_id, None)
+            return True
+        
+        music_player = self.players[guild_id]
+        # Поки шард відключений від Discord, чекаємо on_shard_resumed
+        if not self.shard_is_up(music_player.shard_id):
+            return True
+        
+        if await self.reconnect_24_7(guild_id, music_player):
+            self._reconnect_attempts.pop(guild_id, None)
+            return True
+        self._reconnect_attempts[guild_id] = self._reconnect_attempts.get(guild_id, 0) + 1
+        self.schedule_24_7(guild_id)
+        return False
+    
+    async def reconnect_24_7(self, guild_id, music_player: MusicPlayer) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return False
+        
+        # Бот відключився, але 24/7 увімкнено - перепідключаємось
+        voice_channel = guild.get_channel(music_player._voice_channel_id)
+        if not voice_channel:
+            # Канал видалено - повторювати немає сенсу
+            logger.warning(f"24/7: канал {music_player._voice_channel_id} більше не існує")
+            return True
+        
+        try:
+            await self.connect_voice(voice_channel)
+            logger.info(f"24/7: Перепідключено до {voice_channel.name} (шард {music_player.shard_id})")
+            
+            # Відновлюємо відтворення якщо була черга (заглушку спершу шукаємо)
+            new_player = self.get_wavelink_player(guild_id)
+            if new_player and music_player.queue.current_track:
+                track = await self.current_playable(music_player)
+                if track is not None:
+                    await new_player.play(track)
+                    self.prefetch_ahead(music_player)
+                else:
+                    # Поточний трек не знайшовся - прибираємо його і граємо наступний
+                    music_player.queue.remove(music_player.queue.position)
+                    await self.play_next(new_player, repeat=False)
+            return True
+        except Exception as e:
+            logger.error(f"24/7: Помилка перепідключення: {e}")
+            return False
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        if member.id != self.bot.user.id:
+            return
+        
+        guild_id = member.guild.id
+        music_player = self.players.get(guild_id)
+        if not music_player:
+            return
+        
+        if after.channel is not None:
+            # Бот у каналі (або його перемістили) - 24/7 тримається нового каналу
+            self.cancel_24_7(guild_id)
+            if music_player._24_7_mode:
+                music_player._voice_channel_id = after.channel.id
+        elif before.channel is not None and music_player._24_7_mode and not music_player._migrating:
+            self.schedule_24_7(guild_id)
+    
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id):
+        # Шард повернувся - одразу відновлюємо 24/7 плеєри
+        self.schedule_shard_24_7(shard_id)
+    
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        self.schedule_shard_24_7(shard_id)
+    
+    @commands.Cog.listener()
+    async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload):
+        # З'явився робочий вузол - пробуємо ті 24/7 сервери, яким не було куди підключитись
+        for shard_id in list(self.shard_players):
+            self.schedule_shard_24_7(shard_id)
     
     def get_player(self, guild_id) -> MusicPlayer:
         if guild_id not in self.players:
-            self.players[guild_id] = MusicPlayer(self.bot, guild_id)
+            music_player = MusicPlayer(self.bot, guild_id)
+            self.players[guild_id] = music_player
+            self.shard_players[music_player.shard_id].add(guild_id)
         return self.players[guild_id]
     
-    async def send_response(self, ctx: commands.Context, content=None, *, embed=None, ephemeral=False):
-        """Універсальна функція для відправки відповіді"""
+    def touch(self, guild_id):
+        music_player = self.players.get(guild_id)
+        if music_player:
+            music_player.touch()
+    
+    async def cog_before_invoke(self, ctx: commands.Context):
+        # Будь-яка команда - активність на сервері
+        if ctx.guild:
+            self.touch(ctx.guild.id)
+        ctx.metrics_started = time.perf_counter()
+        # Трейс до cog_after_invoke; спани всередині команди читають його з контексту
+        ctx.trace = self.tracer.start(
+            ctx.command.qualified_name if ctx.command else "unknown",
+            guild_id=ctx.guild.id if ctx.guild else None,
+            user_id=ctx.author.id,
+            slash=ctx.interaction is not None,
+        )
+    
+    async def cog_after_invoke(self, ctx: commands.Context):
+        self.tracer.finish(getattr(ctx, 'trace', None), error="command_failed" if ctx.command_failed else None)
+        started = getattr(ctx, 'metrics_started', None)
+        if started is None or ctx.command is None:
+            return
+        command = ctx.command.qualified_name
+        COMMAND_LATENCY.observe(time.perf_counter() - started, command=command)
+        COMMANDS_TOTAL.inc(command=command, status="error" if ctx.command_failed else "ok")
+    
+    async def _reaper(self):
+        """Прибирає неактивні плеєри і виходить з каналів, де давно нічого не грає"""
+        try:
+            await self.reap_idle()
+        except Exception as e:
+            logger.error(f"Помилка прибирання неактивних плеєрів: {e}")
+        finally:
+            self.timers.schedule("reaper", Config.REAPER_INTERVAL, self._reaper)
+    
+    async def reap_idle(self):
+        removed = disconnected = 0
+        for guild_id, music_player in list(self.players.items()):
+            if music_player._24_7_mode or music_player._migrating or music_player._pending_loads:
+                continue
+            
+            player = self.get_wavelink_player(guild_id)
+            if player is None:
+                # Немає голосового підключення (напр. лише !queue чи !loop) - стан більше не потрібен
+                if music_player.idle_for >= Config.PLAYER_IDLE_TTL:
+                    self.remove_player(guild_id)
+                    removed += 1
+                continue
+            
+            silent = player.current is None or player.paused
+            if (Config.IDLE_DISCONNECT_TIMEOUT and silent
+                    and music_player.idle_for >= Config.IDLE_DISCONNECT_TIMEOUT):
+                try:
+                    await player.disconnect()
+                except Exception as e:
+                    logger.error(f"Не вдалось відключитись від неактивного каналу {guild_id}: {e}")
+                    continue
+                self.remove_player(guild_id)
+                disconnected += 1
+        
+        # Панелі серверів, для яких плеєра вже немає
+        for guild_id in [guild_id for guild_id in self.control_messages if guild_id not in self.players]:
+            del self.control_messages[guild_id]
+        for guild_id in [guild_id for guild_id in self._progress_sent if guild_id not in self.control_messages]:
+            del self._progress_sent[guild_id]
+        channels = {message.channel.id for message in self.control_messages.values()}
+        for channel_id in [channel_id for channel_id in self._messages_since if channel_id not in channels]:
+            del self._messages_since[channel_id]
+        
+        self.reaped["players"] += removed
+        self.reaped["disconnects"] += disconnected
+        if removed or disconnected:
+            logger.info(f"Прибрано неактивних плеєрів: {removed}, відключено від каналів: {disconnected}")
+    
+    def registry_gauges(self):
+        """Поточні розміри реєстрів - щоб бачити, що процес не росте безмежно"""
+        idle = sum(1 for music_player in self.players.values() if music_player.idle_for >= Config.REAPER_INTERVAL)
+        return {
+            "players": len(self.players),
+            "voice": len(self.bot.voice_clients),
+            "idle": idle,
+            "panels": len(self.control_messages),
+            "timers": len(self.timers),
+            "memory": memory_rss(),
+        }
+    
+    def remove_player(self, guild_id):
+        """Прибирає плеєр сервера разом з кнопками керування"""
+        music_player = self.players.pop(guild_id, None)
+        if music_player:
+            self.shard_players[music_player.shard_id].discard(guild_id)
+        self.control_messages.pop(guild_id, None)
+        self._progress_sent.pop(guild_id, None)
+        self.controls_updater.cancel(guild_id)
+        self.not_found_reports.cancel(guild_id)
+        self._not_found.pop(guild_id, None)
+        self.cancel_24_7(guild_id)
+        return music_player
+    
+    def shard_is_up(self, shard_id) -> bool:
+        shard = self.bot.get_shard(shard_id)
+        return shard is not None and not shard.is_closed()
+    
+    async def send_response(self, ctx: commands.Context, content=None, *, embed=None, ephemeral=False,
+                            key=None, merge=None):
+        """Універсальна функція для відправки відповіді.
+
+        Відповіді на interaction йдуть одразу (окремий ліміт і 3 секунди на
+        відповідь), решта - через чергу каналу без очікування відправки;
+        key/merge - див. Outbox.submit.
+        """
+        with span("discord.send_response", interaction=ctx.interaction is not None):
+            await self._send_response(ctx, content, embed=embed, ephemeral=ephemeral, key=key, merge=merge)
+    
+    async def _send_response(self, ctx: commands.Context, content=None, *, embed=None, ephemeral=False,
+                             key=None, merge=None):
         try:
             if ctx.interaction:
                 if ctx.interaction.response.is_done():
@@ -388,7 +1237,7 @@ class Music(commands.Cog):
                 else:
                     await ctx.interaction.response.send_message(content=content, embed=embed, ephemeral=ephemeral)
             else:
-                await ctx.send(content=content, embed=embed)
+                self.post_message(ctx.channel, content, embed=embed, key=key, merge=merge)
         except discord.HTTPException as e:
             if e.code == 40060:
                 try:
@@ -398,87 +1247,238 @@ class Music(commands.Cog):
             else:
                 raise
     
-    def get_spotify_tracks(self, query: str):
-        """Конвертує Spotify посилання в пошукові запити для YouTube"""
+    async def send_message(self, channel, content=None, *, key=None, merge=None, priority=PRIORITY_REPLY, **kwargs):
+        """channel.send через чергу каналу з урахуванням лімітів Discord"""
+        return await self._submit_message(channel, content, key, merge, priority, kwargs)
+    
+    def post_message(self, channel, content=None, *, key=None, merge=None, priority=PRIORITY_REPLY, **kwargs):
+        """Те саме, що send_message, але без очікування: повертає Future, помилки лише логуються"""
+        future = self._submit_message(channel, content, key, merge, priority, kwargs)
+        future.add_done_callback(self._log_send_error)
+        return future
+    
+    def _submit_message(self, channel, content, key, merge, priority, kwargs):
+        payload = {"channel": channel, "kwargs": {"content": content, **kwargs}}
+        return self.outbox.submit(channel.id, self._deliver, payload, key=key, merge=merge, priority=priority)
+    
+    @staticmethod
+    def _log_send_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Не вдалося відправити повідомлення: {future.exception()}")
+    
+    @staticmethod
+    async def _deliver(payload):
+        return await payload["channel"].send(**payload["kwargs"])
+    
+    async def reply_message(self, ctx: commands.Context, **kwargs):
+        """Відповідь, від якої потрібне повідомлення (напр. з View)"""
+        if ctx.interaction:
+            return await ctx.send(**kwargs)
+        return await self.send_message(ctx.channel, **kwargs)
+    
+    @staticmethod
+    def merge_added(old, new):
+        """Кілька "Додано в чергу" поспіль - одне повідомлення зі списком"""
+        lines = old.get("lines") or [old["kwargs"]["embed"].description]
+        lines = lines + [new["kwargs"]["embed"].description]
+        description = "\n".join(lines[:10])
+        if len(lines) > 10:
+            description += f"\n...і ще {len(lines) - 10}"
+        embed = discord.Embed(
+            title=f"✅ Додано в чергу: {len(lines)}",
+            description=description,
+            color=discord.Color.blue()
+        )
+        return {**new, "kwargs": {**new["kwargs"], "embed": embed}, "lines": lines}
+    
+    async def iter_spotify_tracks(self, query: str, limit: Optional[int] = None):
+        """Ліниво віддає метадані треків за Spotify посиланням (з пагінацією)"""
         if not self.spotify:
-            return None
-            
+            return
+        
+        kind, spotify_id = parse_spotify_url(query)
+        if not kind:
+            return
+        
         try:
-            if "track" in query:
-                track_id = query.split("/track/")[1].split("?")[0]
-                track = self.spotify.track(track_id)
-                search_query = f"{track['name']} {' '.join([a['name'] for a in track['artists']])}"
-                return [search_query]
-                
-            elif "playlist" in query:
-                playlist_id = query.split("/playlist/")[1].split("?")[0]
-                results = self.spotify.playlist_tracks(playlist_id)
-                tracks = []
-                for item in results['items']:
-                    track = item['track']
-                    if track:
-                        search_query = f"{track['name']} {' '.join([a['name'] for a in track['artists']])}"
-                        tracks.append(search_query)
-                return tracks
-                
-            elif "album" in query:
-                album_id = query.split("/album/")[1].split("?")[0]
-                album = self.spotify.album(album_id)
-                tracks = []
-                for track in album['tracks']['items']:
-                    search_query = f"{track['name']} {' '.join([a['name'] for a in track['artists']])}"
-                    tracks.append(search_query)
-                return tracks
-                
+            async with aclosing(self.spotify.iter_pages(kind, spotify_id, limit=limit)) as pages:
+                for page_number in count():
+                    # Спан лише на завантаження сторінки - без часу, поки черга її споживає
+                    with span("spotify.tracks", kind=kind, page=page_number) as page_span:
+                        page = await anext(pages, None)
+                        if page is None:
+                            break
+                        await self.prefetch_index(page)
+                        page_span.set(results=len(page))
+                    for track in page:
+                        yield track
         except Exception as e:
             logger.error(f"Spotify помилка: {e}")
-            return None
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Нормалізує запит для ключа кешу (URL залишаємо чутливими до регістру)"""
+        query = " ".join(query.split())
+        if URL_REGEX.match(query):
+            return query
+        return query.casefold()
+    
+    async def fetch_payloads(self, query: str, source=None, origin=None):
+        """Пошук через Lavalink з кешуванням: дані треків (TrackPayload) як їх повернув вузол.
+
+        origin - мітка source для метрик, якщо запит робиться від імені іншого
+        джерела (напр. пошук треку Spotify на YouTube).
+        """
+        key = (self.normalize_query(query), str(source) if source else "default")
+        cached = self.search_cache.get(key)
+        if cached is None:
+            # Однакові одночасні запити чекають на один спільний пошук
+            with span("lavalink.search", source=key[1]):
+                cached = await self.search_flights.do(key, lambda: self._load_payloads(key, query, source, origin))
+        return cached
+    
+    async def fetch_playables(self, query: str, source=None):
+        """Пошук через Lavalink з кешуванням закодованих треків"""
+        # Кожен виклик отримує власні об'єкти треків (окремий requester)
+        return [wavelink.Playable(data) for data in await self.fetch_payloads(query, source)]
+    
+    async def _load_payloads(self, key, query: str, source=None, origin=None):
+        """Завантажує треки з вузла Lavalink (за NodeBalancer.load_order) і кладе їх у кеш"""
+        identifier = build_identifier(query, source)
+        source_label = origin or query_source(identifier)
+        with LAVALINK_LOAD_LATENCY.time(source=source_label), span("lavalink.load_tracks", source=source_label) as load_span:
+            payloads = await self.node_balancer.load_tracks(identifier)
+            load_span.set(results=len(payloads) if payloads else 0)
+        if payloads:
+            self.search_cache.set(key, payloads)
+        return payloads
+    
+    async def prefetch_index(self, spotify_tracks):
+        """Один пакетний запит до індексу для цілої сторінки Spotify"""
+        pairs = [
+            (track.get('id'), track.get('external_ids', {}).get('isrc'))
+            for track in spotify_tracks if track.get('id')
+        ]
+        try:
+            entries = await self.track_index.get_many(pairs)
+        except Exception as e:
+            logger.error(f"Помилка читання індексу треків: {e}")
+            return
+        for spotify_id, entry in entries.items():
+            # False - трека точно немає в індексі, повторно базу не питаємо
+            self._index_prefetch.set(spotify_id, entry or False)
+    
+    async def resolve_spotify_track(self, spotify_track: dict):
+        """Знаходить трек Lavalink для треку Spotify (спершу в постійному індексі)"""
+        with SEARCH_LATENCY.time(source="spotify"), span("spotify.resolve"):
+            return await self._resolve_spotify_track(spotify_track)
+    
+    async def _resolve_spotify_track(self, spotify_track: dict):
+        spotify_id = spotify_track.get('id')
+        isrc = spotify_track.get('external_ids', {}).get('isrc')
         
-        return None
+        entry = self._index_prefetch.pop(spotify_id) if spotify_id else None
+        if entry is None:
+            entry = await self.track_index.get(spotify_id, isrc)
+        
+        if entry:
+            if self.track_index.is_stale(entry):
+                self.schedule_revalidation(spotify_track)
+            return wavelink.Playable(entry.payload)
+        
+        return await self._search_spotify_track(spotify_track)
     
-    async def search_tracks(self, query: str, requester: discord.Member, max_results: int = 5):
-        """Пошук треків з різних джерел"""
+    async def _search_spotify_track(self, spotify_track: dict):
+        """Шукає трек Spotify (ISRC, потім текст з оцінкою) і запам'ятовує результат в індексі"""
+        isrc = spotify_track.get('external_ids', {}).get('isrc')
+        match = None
         
-        # Перевіряємо чи це Spotify
-        if "spotify.com" in query and self.spotify:
-            spotify_tracks = self.get_spotify_tracks(query)
-            if spotify_tracks:
-                tracks = []
-                for search_query in spotify_tracks[:50]:
-                    try:
-                        results = await wavelink.Playable.search(search_query, source=wavelink.TrackSource.YouTube)
-                        if results:
-                            track = results[0]
-                            track.requester = requester
-                            tracks.append(track)
-                    except:
-                        continue
-                return tracks
-            return None
+        # Точний пошук за ISRC
+        if isrc and Config.ISRC_SEARCH_SOURCE:
+            try:
+                payloads = await self.fetch_payloads(
+                    Config.ISRC_SEARCH_TEMPLATE.format(isrc=isrc), source=Config.ISRC_SEARCH_SOURCE, origin="spotify"
+                )
+            except Exception as e:
+                logger.debug(f"ISRC пошук {isrc} не вдався: {e}")
+                payloads = []
+            
+            best, score = self.match_payloads(spotify_track, payloads)
+            if best is not None and score >= Config.MATCH_MIN_SCORE:
+                match = best
+        
+        # Текстовий пошук, кандидати ранжуються за назвою, виконавцем і тривалістю
+        if match is None:
+            payloads = await self.fetch_payloads(
+                build_search_query(spotify_track), source=wavelink.TrackSource.YouTube, origin="spotify"
+            )
+            if not payloads:
+                raise LookupError("нічого не знайдено")
+            
+            match, score = self.match_payloads(spotify_track, payloads)
+            if score < Config.MATCH_MIN_SCORE:
+                logger.debug(f"Слабкий збіг ({score:.2f}) для '{build_search_query(spotify_track)}': {match[1].title}")
+        
+        payload, track = match
+        await self.track_index.put(spotify_track.get('id'), isrc, payload)
+        return track
+    
+    @staticmethod
+    def match_payloads(spotify_track: dict, payloads):
+        """pick_best для даних Lavalink: повертає ((payload, Playable), оцінка).
+        
+        Playable не зберігає даних, з яких створений, тож payload для індексу
+        тримаємо поруч із кандидатом.
+        """
+        pairs = [(data, wavelink.Playable(data)) for data in payloads[:Config.MATCH_CANDIDATES]]
+        best, score = pick_best(spotify_track, [track for _, track in pairs], limit=Config.MATCH_CANDIDATES)
+        for pair in pairs:
+            if pair[1] is best:
+                return pair, score
+        return None, score
+    
+    def schedule_revalidation(self, spotify_track: dict):
+        """Оновлює застарілий запис індексу у фоні"""
+        spotify_id = spotify_track.get('id')
+        if not spotify_id or spotify_id in self._revalidating:
+            return
+        self._revalidating.add(spotify_id)
+        
+        async def revalidate():
+            try:
+                await self._search_spotify_track(spotify_track)
+            except Exception as e:
+                logger.debug(f"Не вдалось оновити запис індексу {spotify_id}: {e}")
+            finally:
+                self._revalidating.discard(spotify_id)
         
-        # Звичайний пошук або YouTube/SoundCloud
+        self.create_background_task(revalidate())
+    
+    async def search_tracks(self, query: str, requester: discord.Member, max_results: int = 5):
+        """Пошук треків з різних джерел"""
+        source = query_source(query)
+        with SEARCH_LATENCY.time(source=source), span("search_tracks", source=source):
+            return await self._search_tracks(query, requester, max_results)
+    
+    async def _search_tracks(self, query: str, requester: discord.Member, max_results: int = 5):
+        # Посилання Spotify сюди не потрапляють - їх обробляє stream_tracks
         try:
             if URL_REGEX.match(query):
                 # Пряме посилання - повертаємо одразу
                 if "soundcloud.com" in query:
-                    results = await wavelink.Playable.search(query, source=wavelink.TrackSource.SoundCloud)
+                    results = await self.fetch_playables(query, source=wavelink.TrackSource.SoundCloud)
                 else:
                     # YouTube або інші джерела
-                    results = await wavelink.Playable.search(query)
+                    results = await self.fetch_playables(query)
                 
                 if results:
-                    if isinstance(results, wavelink.Playlist):
-                        for track in results.tracks:
-                            track.requester = requester
-                        return list(results.tracks)
-                    else:
-                        for track in results:
-                            track.requester = requester
-                        return results
+                    for track in results:
+                        track.requester = requester
+                    return results
                 return None
             else:
                 # Пошук по назві (YouTube) - повертаємо кілька результатів для вибору
-                results = await wavelink.Playable.search(f"ytsearch:{query}")
+                results = await self.fetch_playables(f"ytsearch:{query}")
                 
                 if results:
                     tracks = []
@@ -492,53 +1492,339 @@ class Music(commands.Cog):
             logger.error(f"Помилка пошуку: {e}")
             return None
     
-    async def play_next(self, player: wavelink.Player):
+    async def stream_tracks(self, query: str, requester: discord.Member, limit: Optional[int] = None):
+        """Асинхронний генератор елементів черги у порядку плейлиста"""
+        if "spotify.com" in query and self.spotify:
+            if limit is None:
+                limit = Config.SPOTIFY_MAX_TRACKS
+            
+            # Сторінки Spotify підвантажуються по мірі того, як черга їх споживає.
+            # У чергу йдуть легкі заглушки - пошук відбувається перед відтворенням
+            spotify_tracks = self.iter_spotify_tracks(query, min(limit, Config.SPOTIFY_MAX_TRACKS))
+            async with aclosing(spotify_tracks):
+                async for spotify_track in spotify_tracks:
+                    yield PendingTrack.from_spotify(spotify_track, requester.id)
+            return
+        
+        # YouTube/SoundCloud плейлисти Lavalink повертає одним запитом
+        for track in await self.search_tracks(query, requester, max_results=1) or []:
+            yield track
+    
+    async def enqueue_stream(self, ctx: commands.Context, player: wavelink.Player, music_player: MusicPlayer, query: str):
+        """Додає треки в чергу по мірі пошуку, відтворення починається після першого.
+        
+        Треки Spotify потрапляють у чергу заглушками; ті, що не вдалось знайти,
+        повідомляються в канал окремо (див. report_not_found).
+        """
+        added = 0
+        queue_full = False
+        
+        # Не завантажуємо більше треків, ніж поміститься в чергу
+        capacity = music_player.queue.free_slots
+        if capacity <= 0:
+            return await self.send_response(ctx, f"❌ Черга заповнена (максимум {Config.MAX_QUEUE_SIZE})!", ephemeral=True)
+        
+        music_player._pending_loads += 1
+        try:
+            async with aclosing(self.stream_tracks(query, ctx.author, limit=capacity)) as stream:
+                async for track in stream:
+                    # Плеєр зупинили поки йшло завантаження
+                    if self.players.get(ctx.guild.id) is not music_player:
+                        break
+                    
+                    if not music_player.queue.add(track):
+                        queue_full = True
+                        break
+                    added += 1
+                    
+                    if added == 1:
+                        await self.send_response(
+                            ctx, embed=self.create_added_embed(track, len(music_player.queue)),
+                            key=("added", ctx.channel.id), merge=self.merge_added
+                        )
+                    
+                    # Починаємо (або продовжуємо) відтворення щойно є трек
+                    if not player.playing:
+                        await self.play_next(player)
+        finally:
+            music_player._pending_loads -= 1
+        
+        self.prefetch_ahead(music_player)
+        
+        if not added:
+            return await self.send_response(ctx, "❌ Нічого не знайдено!", ephemeral=True)
+        
+        if added > 1 or queue_full:
+            embed = discord.Embed(
+                title="📃 Плейлист додано",
+                description=f"Додано треків: **{added}**",
+                color=discord.Color.blue()
+            )
+            if queue_full:
+                embed.add_field(name="Увага", value=f"Черга заповнена (максимум {Config.MAX_QUEUE_SIZE})", inline=False)
+            await self.send_response(ctx, embed=embed)
+    
+    def prefetch_ahead(self, music_player: MusicPlayer):
+        """Запускає фоновий пошук для наступних QUEUE_LOOKAHEAD заглушок у черзі"""
+        for track in music_player.queue.upcoming(Config.QUEUE_LOOKAHEAD):
+            if isinstance(track, PendingTrack) and track.task is None:
+                track.task = self.create_background_task(self._resolve_pending(music_player, track))
+    
+    async def current_playable(self, music_player: MusicPlayer):
+        """Playable для поточного треку черги (заглушку спершу шукаємо), None - якщо грати нічого"""
+        current = music_player.queue.current_track
+        if isinstance(current, PendingTrack):
+            current = await self.resolve_pending(music_player, current)
+        return current.to_playable() if current is not None else None
+    
+    async def resolve_pending(self, music_player: MusicPlayer, pending: PendingTrack):
+        """Повертає знайдений трек для заглушки (чекає на вже запущений пошук)"""
+        if pending.task is None:
+            pending.task = self.create_background_task(self._resolve_pending(music_player, pending))
+        return await pending.task
+    
+    async def _resolve_pending(self, music_player: MusicPlayer, pending: PendingTrack):
+        try:
+            if pending.spotify_track is not None:
+                track = await asyncio.wait_for(
+                    self.resolve_spotify_track(pending.spotify_track), timeout=Config.SPOTIFY_RESOLVE_TIMEOUT
+                )
+            else:
+                results = await self.fetch_playables(pending.query)
+                if not results:
+                    raise LookupError("нічого не знайдено")
+                track = results[0]
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Не вдалось знайти трек '{pending.title}': {e}")
+            self.report_not_found(music_player, pending)
+            return None
+        
+        record = TrackRecord.from_playable(track, requester_id=pending.requester_id)
+        music_player.queue.replace(pending, record)
+        return record
+    
+    def report_not_found(self, music_player: MusicPlayer, pending: PendingTrack):
+        """Треки, які не вдалось знайти за NOT_FOUND_REPORT_DELAY, - одним повідомленням у канал"""
+        guild_id = music_player.guild_id
+        if self.players.get(guild_id) is not music_player or not music_player.text_channel:
+            return
+        self._not_found[guild_id].append(pending)
+        self.not_found_reports.submit(guild_id, lambda: self._send_not_found(guild_id))
+    
+    async def _send_not_found(self, guild_id):
+        tracks = self._not_found.pop(guild_id, [])
+        music_player = self.players.get(guild_id)
+        if not tracks or not music_player or not music_player.text_channel:
+            return
+        
+        lines = [f"• **{track.title}**" + (f" — {track.author}" if track.author else "") for track in tracks[:10]]
+        if len(tracks) > 10:
+            lines.append(f"...і ще {len(tracks) - 10}")
+        embed = discord.Embed(
+            title=f"⚠️ Не вдалось знайти: {len(tracks)}",
+            description="\n".join(lines),
+            color=discord.Color.orange()
+        )
+        embed.set_footer(text="Ці треки пропущено")
+        await self.send_message(music_player.text_channel, embed=embed, priority=PRIORITY_UPDATE)
+    
+    async def play_next(self, player: wavelink.Player, repeat: bool = True):
         """Програває наступний трек"""
+        with PLAY_NEXT_LATENCY.time(), span("play_next"):
+            await self._play_next(player, repeat)
+    
+    async def _play_next(self, player: wavelink.Player, repeat: bool = True):
         guild_id = player.guild.id
         music_player = self.get_player(guild_id)
-        
-        next_track = music_player.queue.next_track
+        queue = music_player.queue
+        
+        next_track = queue.advance(repeat)
+        
+        # Заглушка - чекаємо на пошук (зазвичай він вже завершився завдяки prefetch)
+        while isinstance(next_track, PendingTrack):
+            pending = next_track
+            resolved = await self.resolve_pending(music_player, pending)
+            # Поки йшов пошук, плеєр могли зупинити, відключити чи прибрати, а чергу - змінити
+            current = queue.current_track
+            if not self.is_active(guild_id, music_player, player) or current is None or \
+                    (current is not pending and current is not resolved):
+                return
+            if resolved is not None:
+                next_track = resolved
+                break
+            # Не знайшли - прибираємо з черги і беремо наступний
+            queue.remove(queue.position)
+            next_track = queue.advance(repeat=False)
         
         if next_track:
-            music_player.queue.position += 1
-            await player.play(next_track)
+            # Playable створюється тільки зараз, у черзі лежить компактний запис
+            await player.play(next_track.to_playable())
+            self.prefetch_ahead(music_player)
             
             # Оновлюємо повідомлення з кнопками
             if music_player.text_channel:
-                embed = self.create_now_playing_embed(next_track, music_player.queue)
+                embed = self.create_now_playing_embed(next_track, queue)
                 await self.send_or_update_controls(music_player.text_channel, embed, guild_id)
         else:
-            # Черга закінчилась
+            # Черга закінчилась, але плейлист ще завантажується - чекаємо на нові треки
+            if music_player._pending_loads:
+                return
+            
             if not music_player._24_7_mode:
                 await player.disconnect()
-                if guild_id in self.players:
-                    del self.players[guild_id]
-                # Видаляємо кнопки
-                if guild_id in self.control_views:
-                    del self.control_views[guild_id]
+                # Видаляємо плеєр і кнопки
+                self.remove_player(guild_id)
+    
+    def is_active(self, guild_id, music_player: MusicPlayer, player: wavelink.Player) -> bool:
+        """Плеєр сервера той самий і підключений (не зупинений, не відключений і не прибраний)"""
+        return (
+            self.players.get(guild_id) is music_player and not music_player._destroyed
+            and self.get_wavelink_player(guild_id) is player and bool(player.connected)
+        )
     
     async def send_or_update_controls(self, channel, embed, guild_id):
-        """Відправляє або оновлює повідомлення з кнопками керування"""
+        """Оновлює панель керування; оновлення у вікні NOW_PLAYING_DEBOUNCE об'єднуються в одне"""
+        self.controls_updater.submit(guild_id, lambda: self.outbox.submit(
+            channel.id, self._publish_controls, (channel, embed, guild_id),
+            key=("controls", guild_id), priority=PRIORITY_UPDATE
+        ))
+    
+    def controls_scrolled(self, message) -> bool:
+        """Панель загубилась серед нових повідомлень - краще відправити заново"""
+        return self._messages_since.get(message.channel.id, 0) >= Config.NOW_PLAYING_SCROLL_LIMIT
+    
+    async def _publish_controls(self, payload):
+        started = time.perf_counter()
+        action = await self._publish_controls_message(*payload)
+        CONTROLS_LATENCY.observe(time.perf_counter() - started, action=action)
+    
+    async def _publish_controls_message(self, channel, embed, guild_id):
+        """Повертає, що зроблено: edit або send"""
+        message = self.control_messages.get(guild_id)
+        
+        # Панель ще на виду - редагуємо її замість видалення і нової відправки
+        if message and message.channel.id == channel.id and not self.controls_scrolled(message):
+            try:
+                await message.edit(embed=embed)
+                self.rest_stats["edits"] += 1
+                self._progress_sent[guild_id] = time.monotonic()
+                return "edit"
+            except discord.NotFound:
+                message = None
+            except discord.HTTPException as e:
+                logger.warning(f"Не вдалось оновити панель керування: {e}")
+        
         try:
-            # Видаляємо старе повідомлення з кнопками якщо є
-            if guild_id in self.control_views:
-                old_view = self.control_views[guild_id]
-                if old_view.message:
-                    try:
-                        await old_view.message.delete()
-                    except:
-                        pass
-            
-            # Створюємо нові кнопки
-            view = MusicControlsView(self, guild_id)
-            self.control_views[guild_id] = view
+            if message:
+                try:
+                    await message.delete()
+                    self.rest_stats["deletes"] += 1
+                except discord.HTTPException:
+                    pass
             
-            # Відправляємо нове повідомлення
-            view.message = await channel.send(embed=embed, view=view)
+            # Відправляємо нове повідомлення зі спільними кнопками
+            self.control_messages[guild_id] = await channel.send(embed=embed, view=self.controls_view)
+            self._messages_since[channel.id] = 0
+            self._progress_sent[guild_id] = time.monotonic()
+            self.rest_stats["sends"] += 1
+            return "send"
         except Exception as e:
             logger.error(f"Помилка відправки кнопок: {e}")
+            return "error"
+    
+    async def _progress_tick(self):
+        try:
+            self.update_progress()
+        except Exception as e:
+            logger.error(f"Помилка оновлення прогресу: {e}")
+        finally:
+            self.timers.schedule("progress", Config.PROGRESS_TICK, self._progress_tick)
+    
+    def update_progress(self):
+        """Один прохід по всіх панелях: прогрес оновлюється в межах загального бюджету.
+
+        Сервери обходяться по колу, тож за великої кількості активних серверів
+        кожен оновлюється рідше, а загальна кількість редагувань не зростає.
+        """
+        guild_ids = list(self.control_messages)
+        if not guild_ids:
+            return
+        
+        budget = max(1, int(Config.PROGRESS_EDITS_PER_SECOND * Config.PROGRESS_TICK))
+        now = time.monotonic()
+        start = self._progress_cursor % len(guild_ids)
+        scanned = edited = 0
+        for guild_id in chain(guild_ids[start:], guild_ids[:start]):
+            if edited >= budget:
+                break
+            scanned += 1
+            
+            if now - self._progress_sent.get(guild_id, 0) < Config.PROGRESS_MIN_INTERVAL:
+                continue
+            # Зміна треку вже в дорозі - вона покаже свіжий стан
+            if guild_id in self.controls_updater:
+                continue
+            player = self.get_wavelink_player(guild_id)
+            message = self.control_messages[guild_id]
+            if (not player or not player.current or player.paused or player.current.is_stream
+                    or self.controls_scrolled(message)):
+                continue
+            
+            self._progress_sent[guild_id] = now
+            self.outbox.submit(
+                message.channel.id, self._edit_progress, guild_id,
+                key=("progress", guild_id), priority=PRIORITY_BACKGROUND
+            )
+            edited += 1
+        self._progress_cursor = start + scanned
+    
+    async def _edit_progress(self, guild_id):
+        # Embed будуємо в момент відправки - стан міг змінитись, поки задача чекала в черзі
+        player = self.get_wavelink_player(guild_id)
+        music_player = self.players.get(guild_id)
+        message = self.control_messages.get(guild_id)
+        if not player or not player.current or not music_player or not message:
+            return None
+        
+        embed = self.create_now_playing_embed(player.current, music_player.queue, position=player.position)
+        try:
+            await message.edit(embed=embed)
+        except discord.NotFound:
+            self.control_messages.pop(guild_id, None)
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"Не вдалось оновити прогрес {guild_id}: {e}")
+            return None
+        self.rest_stats["progress_edits"] += 1
+        return message
+    
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        # Рахуємо повідомлення лише в каналах з панеллю керування
+        if message.channel.id in self._messages_since:
+            self._messages_since[message.channel.id] += 1
+    
+    def create_added_embed(self, track: wavelink.Playable, position: int):
+        embed = discord.Embed(
+            title="✅ Додано в чергу",
+            description=f"**[{track.title}]({track.uri})**",
+            color=discord.Color.blue()
+        )
+        if hasattr(track, 'author'):
+            embed.add_field(name="Виконавець", value=track.author, inline=True)
+        embed.add_field(name="Тривалість", value=self.format_duration(track.length), inline=True)
+        embed.add_field(name="Позиція в черзі", value=position, inline=True)
+        return embed
     
-    def create_now_playing_embed(self, track: wavelink.Playable, queue: MusicQueue):
+    def progress_bar(self, position: int, length: int) -> str:
+        width = Config.PROGRESS_BAR_WIDTH
+        ratio = min(1.0, max(0.0, position / length)) if length else 0.0
+        filled = round(ratio * (width - 1))
+        return "▬" * filled + "🔘" + "▬" * (width - 1 - filled)
+    
+    def create_now_playing_embed(self, track, queue: MusicQueue, position: int = 0):
         embed = discord.Embed(
             title="▶️ Зараз грає",
             description=f"**[{track.title}]({track.uri})**",
@@ -551,14 +1837,16 @@ class Music(commands.Cog):
         duration = self.format_duration(track.length)
         embed.add_field(name="Тривалість", value=duration, inline=True)
         
-        if hasattr(track, 'requester') and track.requester:
-            embed.add_field(name="Замовив", value=track.requester.mention, inline=True)
+        requester_id = getattr(track, 'requester_id', None)
+        if requester_id:
+            embed.add_field(name="Замовив", value=f"<@{requester_id}>", inline=True)
         
         # Прогрес бар
-        if track.length:
+        if track.length and not getattr(track, 'is_stream', False):
+            position = min(int(position), track.length)
             embed.add_field(
                 name="Прогрес",
-                value=f"0:00 / {duration}",
+                value=f"{self.progress_bar(position, track.length)}\n`{self.format_duration(position)} / {duration}`",
                 inline=False
             )
         
@@ -567,7 +1855,7 @@ class Music(commands.Cog):
             embed.set_thumbnail(url=track.artwork)
         
         # Інформація про чергу
-        remaining = len(queue._queue) - queue.position - 1
+        remaining = len(queue) - queue.position - 1
         if remaining > 0:
             embed.set_footer(text=f"У черзі ще {remaining} трек(ів) | Режим: {queue.loop_mode}")
         else:
@@ -590,15 +1878,17 @@ class Music(commands.Cog):
         """Обробник закінчення треку"""
         if not payload.player:
             return
-            
-        await self.play_next(payload.player)
+        self.touch(payload.player.guild.id)
+        
+        # Повтор треку - тільки якщо трек дограв сам, а не був пропущений
+        await self.play_next(payload.player, repeat=payload.reason == "finished")
     
     @commands.Cog.listener()
     async def on_wavelink_track_exception(self, payload: wavelink.TrackExceptionEventPayload):
         """Обробник помилки треку"""
         logger.error(f"Помилка відтворення: {payload.exception}")
         if payload.player:
-            await self.play_next(payload.player)
+            await self.play_next(payload.player, repeat=False)
     
     @commands.hybrid_command(name="play", description="Програти музику з YouTube, Spotify або SoundCloud")
     @app_commands.describe(query="Назва пісні або посилання")
@@ -612,11 +1902,11 @@ class Music(commands.Cog):
         voice_channel = ctx.author.voice.channel
         
         # Підключаємось до каналу
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player:
             try:
-                player = await voice_channel.connect(cls=wavelink.Player)
+                player = await self.connect_voice(voice_channel)
             except Exception as e:
                 return await self.send_response(ctx, f"❌ Не вдалось підключитись: {e}", ephemeral=True)
         elif player.channel != voice_channel:
@@ -631,29 +1921,23 @@ class Music(commands.Cog):
         if ctx.interaction:
             await ctx.interaction.response.defer()
         
-        # Якщо це URL - додаємо одразу, інакше показуємо вибір
-        is_url = URL_REGEX.match(query)
-        tracks = await self.search_tracks(query, ctx.author, max_results=5 if not is_url else 1)
+        # Посилання (у т.ч. плейлисти) - додаємо в чергу по мірі пошуку
+        if URL_REGEX.match(query) or "spotify.com" in query:
+            return await self.enqueue_stream(ctx, player, music_player, query)
+        
+        tracks = await self.search_tracks(query, ctx.author, max_results=5)
         
         if not tracks:
             return await self.send_response(ctx, "❌ Нічого не знайдено!", ephemeral=True)
         
-        # Якщо це URL або тільки один результат - додаємо одразу
-        if is_url or len(tracks) == 1:
+        # Якщо тільки один результат - додаємо одразу
+        if len(tracks) == 1:
             track = tracks[0]
             music_player.queue.add(track)
-            
-            embed = discord.Embed(
-                title="✅ Додано в чергу",
-                description=f"**[{track.title}]({track.uri})**",
-                color=discord.Color.blue()
+            await self.send_response(
+                ctx, embed=self.create_added_embed(track, len(music_player.queue)),
+                key=("added", ctx.channel.id), merge=self.merge_added
             )
-            if hasattr(track, 'author'):
-                embed.add_field(name="Виконавець", value=track.author, inline=True)
-            embed.add_field(name="Тривалість", value=self.format_duration(track.length), inline=True)
-            embed.add_field(name="Позиція в черзі", value=len(music_player.queue._queue), inline=True)
-            
-            await self.send_response(ctx, embed=embed)
         else:
             # Показуємо вибір пісні
             view = SongSelectView(tracks, ctx, self)
@@ -663,8 +1947,10 @@ class Music(commands.Cog):
                 color=discord.Color.blue()
             )
             
-            select_msg = await ctx.send(embed=embed, view=view)
-            await view.wait()
+            select_msg = await self.reply_message(ctx, embed=embed, view=view)
+            with span("select.wait", options=len(tracks)) as select_span:
+                await view.wait()
+                select_span.set(selected=view.selected_track is not None)
             
             # Видаляємо повідомлення з вибором
             try:
@@ -677,18 +1963,10 @@ class Music(commands.Cog):
             
             track = view.selected_track
             music_player.queue.add(track)
-            
-            embed = discord.Embed(
-                title="✅ Додано в чергу",
-                description=f"**[{track.title}]({track.uri})**",
-                color=discord.Color.blue()
+            await self.send_response(
+                ctx, embed=self.create_added_embed(track, len(music_player.queue)),
+                key=("added", ctx.channel.id), merge=self.merge_added
             )
-            if hasattr(track, 'author'):
-                embed.add_field(name="Виконавець", value=track.author, inline=True)
-            embed.add_field(name="Тривалість", value=self.format_duration(track.length), inline=True)
-            embed.add_field(name="Позиція в черзі", value=len(music_player.queue._queue), inline=True)
-            
-            await ctx.send(embed=embed)
         
         # Якщо нічого не грає - починаємо
         if not player.playing:
@@ -700,9 +1978,11 @@ class Music(commands.Cog):
         """Режим 24/7 - бот залишається в каналі навіть коли нічого не грає"""
         music_player = self.get_player(ctx.guild.id)
         music_player._24_7_mode = enabled
+        if not enabled:
+            self.cancel_24_7(ctx.guild.id)
         
         # Зберігаємо поточний голосовий канал
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         if player and player.channel:
             music_player._voice_channel_id = player.channel.id
         
@@ -725,7 +2005,7 @@ class Music(commands.Cog):
     @commands.hybrid_command(name="skip", description="Пропустити поточний трек")
     async def skip(self, ctx: commands.Context):
         """Пропустити трек"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player or not player.playing:
             return await self.send_response(ctx, "❌ Зараз нічого не грає!", ephemeral=True)
@@ -736,7 +2016,7 @@ class Music(commands.Cog):
     @commands.hybrid_command(name="stop", description="Зупинити музику та очистити чергу")
     async def stop(self, ctx: commands.Context):
         """Зупинити музику"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player:
             return await self.send_response(ctx, "❌ Бот не у голосовому каналі!", ephemeral=True)
@@ -747,18 +2027,16 @@ class Music(commands.Cog):
         
         await player.stop()
         await player.disconnect()
-        del self.players[ctx.guild.id]
         
-        # Видаляємо кнопки
-        if ctx.guild.id in self.control_views:
-            del self.control_views[ctx.guild.id]
+        # Видаляємо плеєр і кнопки
+        self.remove_player(ctx.guild.id)
         
         await self.send_response(ctx, "⏹️ Музику зупинено та чергу очищено!")
     
     @commands.hybrid_command(name="pause", description="Призупинити музику")
     async def pause(self, ctx: commands.Context):
         """Призупинити"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player or not player.playing:
             return await self.send_response(ctx, "❌ Зараз нічого не грає!", ephemeral=True)
@@ -772,7 +2050,7 @@ class Music(commands.Cog):
     @commands.hybrid_command(name="resume", description="Продовжити музику")
     async def resume(self, ctx: commands.Context):
         """Продовжити"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player:
             return await self.send_response(ctx, "❌ Бот не у голосовому каналі!", ephemeral=True)
@@ -844,7 +2122,7 @@ class Music(commands.Cog):
         if not 0 <= volume <= 100:
             return await self.send_response(ctx, "❌ Гучність має бути від 0 до 100!", ephemeral=True)
         
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player:
             return await self.send_response(ctx, "❌ Бот не у голосовому каналі!", ephemeral=True)
@@ -859,13 +2137,13 @@ class Music(commands.Cog):
     @commands.hybrid_command(name="nowplaying", description="Інформація про поточний трек")
     async def nowplaying(self, ctx: commands.Context):
         """Зараз грає"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player or not player.current:
             return await self.send_response(ctx, "❌ Зараз нічого не грає!", ephemeral=True)
         
         music_player = self.get_player(ctx.guild.id)
-        embed = self.create_now_playing_embed(player.current, music_player.queue)
+        embed = self.create_now_playing_embed(player.current, music_player.queue, position=player.position)
         await self.send_response(ctx, embed=embed)
     
     @commands.hybrid_command(name="remove", description="Видалити трек з черги")
@@ -874,7 +2152,7 @@ class Music(commands.Cog):
         """Видалити трек"""
         music_player = self.get_player(ctx.guild.id)
         
-        if position < 1 or position > len(music_player.queue._queue):
+        if position < 1 or position > len(music_player.queue):
             return await self.send_response(ctx, "❌ Невірна позиція!", ephemeral=True)
         
         removed = music_player.queue.remove(position - 1)
@@ -891,7 +2169,7 @@ class Music(commands.Cog):
         if not music_player.queue.jump(position - 1):
             return await self.send_response(ctx, "❌ Невірна позиція!", ephemeral=True)
         
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         if player:
             await player.skip()
         
@@ -900,7 +2178,7 @@ class Music(commands.Cog):
     @commands.hybrid_command(name="disconnect", description="Відключити бота від каналу")
     async def disconnect(self, ctx: commands.Context):
         """Відключити"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player:
             return await self.send_response(ctx, "❌ Бот не у голосовому каналі!", ephemeral=True)
@@ -908,31 +2186,194 @@ class Music(commands.Cog):
         music_player = self.get_player(ctx.guild.id)
         music_player._24_7_mode = False
         
-        if ctx.guild.id in self.players:
-            del self.players[ctx.guild.id]
-        
-        # Видаляємо кнопки
-        if ctx.guild.id in self.control_views:
-            del self.control_views[ctx.guild.id]
+        # Видаляємо плеєр і кнопки
+        self.remove_player(ctx.guild.id)
         
         await player.disconnect()
         await self.send_response(ctx, "👋 Бот відключено!")
     
+    @commands.hybrid_command(name="nodes", description="Стан і навантаження вузлів Lavalink")
+    async def nodes(self, ctx: commands.Context):
+        """Стан вузлів Lavalink"""
+        embed = discord.Embed(
+            title="🛰️ Вузли Lavalink",
+            color=discord.Color.blue()
+        )
+        
+        for node in wavelink.Pool.nodes.values():
+            stats = self.node_balancer.stats.get(node.identifier)
+            connected = node.status == wavelink.NodeStatus.CONNECTED
+            lines = [
+                f"Стан: {'🟢' if connected else '🔴'} {node.status.name}",
+                f"Гравці (бот): {len(node.players)}",
+            ]
+            if stats and stats.updated_at:
+                lines += [
+                    f"Гравці (вузол): {stats.playing}/{stats.players}",
+                    f"CPU: {stats.system_load * 100:.0f}% (Lavalink {stats.lavalink_load * 100:.0f}%)",
+                    f"Втрачені кадри: {stats.frames_deficit} | Null: {stats.frames_nulled}",
+                    f"Пінг: {stats.ping:.0f} мс",
+                ]
+            regions = self.node_balancer.regions.get(node.identifier)
+            if regions:
+                lines.append(f"Регіони: {', '.join(regions)}")
+            if connected:
+                lines.append(f"Оцінка навантаження: {self.node_balancer.penalty(node):.1f}")
+            embed.add_field(name=node.identifier, value="\n".join(lines), inline=True)
+        
+        if not embed.fields:
+            embed.description = "❌ Немає налаштованих вузлів"
+        
+        if self.failover_stats["count"]:
+            embed.set_footer(
+                text=f"Аварійних перенесень: {self.failover_stats['count']} | "
+                     f"Плеєрів перенесено: {self.failover_stats['players']} | "
+                     f"Останнє відновлення: {self.failover_stats['last_duration']:.2f} с"
+            )
+        
+        await self.send_response(ctx, embed=embed)
+    
+    @commands.hybrid_command(name="shards", description="Стан шардів: затримка, сервери, плеєри")
+    async def shards(self, ctx: commands.Context):
+        """Стан шардів цього процесу"""
+        embed = discord.Embed(
+            title="🧩 Шарди",
+            color=discord.Color.blue()
+        )
+        
+        guild_counts = Counter(guild.shard_id for guild in self.bot.guilds)
+        voice_counts = Counter(
+            guild.shard_id for guild in self.bot.guilds if isinstance(guild.voice_client, wavelink.Player)
+        )
+        for shard_id, shard in sorted(self.bot.shards.items()):
+            latency = None if math.isnan(shard.latency) else shard.latency * 1000  # NaN до першого heartbeat
+            lines = [
+                f"Стан: {'🔴 відключено' if shard.is_closed() else '🟢 онлайн'}",
+                f"Затримка: {f'{latency:.0f} мс' if latency is not None else '—'}",
+                f"Серверів: {guild_counts.get(shard_id, 0)}",
+                f"Плеєрів: {voice_counts.get(shard_id, 0)} / черг: {len(self.shard_players.get(shard_id, ()))}",
+            ]
+            marker = " 📍" if ctx.guild and ctx.guild.shard_id == shard_id else ""
+            embed.add_field(name=f"Шард {shard_id}{marker}", value="\n".join(lines), inline=True)
+        
+        reconnects = self.reconnects.stats()
+        lines = [
+            f"У черзі: {reconnects['queued']} | Виконується: {reconnects['in_flight']}",
+            f"Успішно: {reconnects['completed']} | Невдало: {reconnects['failed']}",
+        ]
+        if reconnects["last_drain"]:
+            jobs, duration = reconnects["last_drain"]
+            lines.append(f"Остання черга: {jobs} за {duration:.1f} с")
+        embed.add_field(name="🔁 Перепідключення", value="\n".join(lines), inline=False)
+        
+        gauges = self.registry_gauges()
+        lines = [
+            f"Плеєрів: {gauges['players']} (неактивних: {gauges['idle']}) | Голосових: {gauges['voice']}",
+            f"Панелей керування: {gauges['panels']} | Таймерів: {gauges['timers']}",
+            f"Прибрано: {self.reaped['players']} | Відключено через тишу: {self.reaped['disconnects']}",
+        ]
+        if gauges["memory"]:
+            lines.append(f"Пам'ять: {gauges['memory'] / 1024 / 1024:.0f} МіБ")
+        embed.add_field(name="📦 Реєстр", value="\n".join(lines), inline=False)
+        
+        outbox = self.outbox.stats()
+        embed.add_field(
+            name="📤 Черга повідомлень",
+            value=f"У черзі: {outbox['depth']} (макс. {outbox['max_depth']}) | Каналів: {outbox['channels']}\n"
+                  f"Відправлено: {outbox['sent']} | Замінено: {outbox['superseded']} | "
+                  f"Об'єднано: {outbox['merged']} | Відкинуто: {outbox['dropped']}\n"
+                  f"Очікування лімітів: {outbox['wait_time']:.1f} с | 429: {outbox['rate_limited']}",
+            inline=False
+        )
+        
+        updater = self.controls_updater
+        embed.add_field(
+            name="✏️ Панелі керування",
+            value=f"Оновлень: {updater.submitted} → виконано {updater.executed}\n"
+                  f"Редагувань: {self.rest_stats['edits']} | Відправок: {self.rest_stats['sends']} | "
+                  f"Видалень: {self.rest_stats['deletes']}\n"
+                  f"Оновлень прогресу: {self.rest_stats['progress_edits']}",
+            inline=False
+        )
+        
+        embed.set_footer(text=f"Шардів у процесі: {len(self.bot.shards)} з {self.bot.shard_count} | "
+                              f"Серверів: {len(self.bot.guilds)}")
+        await self.send_response(ctx, embed=embed)
+    
+    @commands.hybrid_command(name="cluster", description="Стан кластера процесів бота")
+    @app_commands.describe(action="stats, restart або status <текст>")
+    async def cluster(self, ctx: commands.Context, action: str = "stats", *, text: str = None):
+        """Статистика всіх процесів кластера і керування ними"""
+        ipc = getattr(self.bot, 'ipc', None)
+        if not ipc or not ipc.connected:
+            return await self.send_response(ctx, "❌ Бот запущено без кластера (cluster.py)", ephemeral=True)
+        
+        action = action.lower()
+        if action in ("restart", "status"):
+            if not await self.bot.is_owner(ctx.author):
+                return await self.send_response(ctx, "❌ Лише власник бота може керувати кластером!", ephemeral=True)
+            
+            if action == "restart":
+                try:
+                    result = await ipc.request("restart")
+                except (asyncio.TimeoutError, ConnectionError, RuntimeError) as e:
+                    return await self.send_response(ctx, f"❌ Хаб кластера не відповідає: {e}", ephemeral=True)
+                if result.get("started"):
+                    return await self.send_response(ctx, "🔄 Кластери перезапускаються по одному")
+                return await self.send_response(ctx, "⏳ Перезапуск вже триває", ephemeral=True)
+            
+            if not text:
+                return await self.send_response(ctx, "❌ Вкажіть текст статусу!", ephemeral=True)
+            try:
+                await ipc.broadcast("presence", {"text": text})
+            except ConnectionError as e:
+                return await self.send_response(ctx, f"❌ Хаб кластера не відповідає: {e}", ephemeral=True)
+            return await self.send_response(ctx, f"✅ Статус оновлено на всіх кластерах: {text}")
+        
+        try:
+            clusters = await ipc.request("cluster_stats")
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError) as e:
+            return await self.send_response(ctx, f"❌ Хаб кластера не відповідає: {e}", ephemeral=True)
+        
+        embed = discord.Embed(
+            title="🖥️ Кластер",
+            color=discord.Color.blue()
+        )
+        totals = Counter()
+        for cluster_id, stats in sorted(clusters.items(), key=lambda item: int(item[0])):
+            latencies = [value for value in stats.get("latency", {}).values() if not math.isnan(value)]
+            lines = [
+                f"Стан: {'🟢' if stats.get('online') else '🔴'} PID {stats.get('pid')}",
+                f"Шарди: {stats['shards'][0]}-{stats['shards'][1]}",
+                f"Серверів: {stats.get('guilds', 0)} | Голос: {stats.get('voice', 0)}",
+            ]
+            if latencies:
+                lines.append(f"Затримка: {sum(latencies) / len(latencies) * 1000:.0f} мс")
+            if stats.get("memory"):
+                lines.append(f"Пам'ять: {stats['memory'] / 1024 / 1024:.0f} МіБ")
+            marker = " 📍" if int(cluster_id) == ipc.cluster_id else ""
+            embed.add_field(name=f"Кластер {cluster_id}{marker}", value="\n".join(lines), inline=True)
+            totals.update(guilds=stats.get("guilds", 0), voice=stats.get("voice", 0))
+        
+        embed.set_footer(text=f"Процесів: {len(clusters)} | Серверів: {totals['guilds']} | Голосових: {totals['voice']}")
+        await self.send_response(ctx, embed=embed)
+    
     @commands.hybrid_command(name="controls", description="Показати панель керування з кнопками")
     async def controls(self, ctx: commands.Context):
         """Показати панель керування"""
-        player = wavelink.Pool.get_node().get_player(ctx.guild.id)
+        player = self.get_wavelink_player(ctx.guild.id)
         
         if not player or not player.current:
             return await self.send_response(ctx, "❌ Зараз нічого не грає!", ephemeral=True)
         
         music_player = self.get_player(ctx.guild.id)
-        embed = self.create_now_playing_embed(player.current, music_player.queue)
+        embed = self.create_now_playing_embed(player.current, music_player.queue, position=player.position)
         
-        # Відправляємо з кнопками
-        view = MusicControlsView(self, ctx.guild.id)
-        self.control_views[ctx.guild.id] = view
-        view.message = await ctx.send(embed=embed, view=view)
+        # Відправляємо з кнопками (стару панель замінює нова)
+        self.controls_updater.cancel(ctx.guild.id)
+        message = await self.reply_message(ctx, embed=embed, view=self.controls_view)
+        self.control_messages[ctx.guild.id] = message
+        self._messages_since[message.channel.id] = 0
 
 
 async def setup(bot: commands.Bot):
@@ -7,6 +7,17 @@ class Config:
     # Discord
     TOKEN = os.getenv('DISCORD_TOKEN')
     
+    # Шардинг (порожньо - кількість шардів визначає Discord, всі шарди в цьому процесі)
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+    SHARD_IDS = [int(i) for i in os.getenv('SHARD_IDS', '').split(',') if i.strip()] or None  # напр. "0,1,2"
+    
+    # Кластер (cluster.py): кілька процесів, кожен зі своїм діапазоном шардів
+    CLUSTER_COUNT = int(os.getenv('CLUSTER_COUNT', str(os.cpu_count() or 1)))
+    CLUSTER_SOCKET = os.getenv('CLUSTER_SOCKET', 'data/cluster.sock')
+    CLUSTER_ID = int(os.getenv('CLUSTER_ID')) if os.getenv('CLUSTER_ID') else None  # задає cluster.py для воркерів
+    CLUSTER_STATS_INTERVAL = int(os.getenv('CLUSTER_STATS_INTERVAL', '15'))  # секунди
+    CLUSTER_READY_TIMEOUT = int(os.getenv('CLUSTER_READY_TIMEOUT', '300'))  # секунди на запуск одного кластера
+    
     # Lavalink (для Railway використовуйте публічний сервер або власний)
     # Можна використати безкоштовні публічні сервери або встановити свій
     # 
@@ -38,13 +49,93 @@ class Config:
     LAVALINK_PASSWORD = os.getenv('LAVALINK_PASSWORD', 'https://dsc.gg/ajidevserver')
     LAVALINK_SSL = os.getenv('LAVALINK_SSL', 'true').lower() == 'true'
     
+    # Кілька вузлів Lavalink (JSON), напр.:
+    # LAVALINK_NODES='[{"identifier": "eu-1", "uri": "https://host:443", "password": "pass", "regions": ["rotterdam"]}]'
+    # Якщо не задано - використовується один вузол з налаштувань вище
+    LAVALINK_NODES = os.getenv('LAVALINK_NODES', '')
+    NODE_STATS_INTERVAL = int(os.getenv('NODE_STATS_INTERVAL', '30'))  # секунди
+    # Секунди між перевірками стану вузлів - це і є затримка виявлення падіння вузла
+    NODE_HEALTH_INTERVAL = float(os.getenv('NODE_HEALTH_INTERVAL', '2'))
+    FAILOVER_CONCURRENCY = int(os.getenv('FAILOVER_CONCURRENCY', '10'))  # одночасні міграції плеєрів
+    
+    # Перепідключення 24/7: експоненційна затримка між спробами
+    RECONNECT_BASE_DELAY = float(os.getenv('RECONNECT_BASE_DELAY', '1'))  # секунди
+    RECONNECT_MAX_DELAY = float(os.getenv('RECONNECT_MAX_DELAY', '300'))  # секунди
+    # Після збою вузла/шлюзу перепідключаємо поступово, щоб не впертись у ліміти Discord і Lavalink
+    RECONNECT_CONCURRENCY = int(os.getenv('RECONNECT_CONCURRENCY', '5'))  # одночасні перепідключення
+    RECONNECT_RATE = float(os.getenv('RECONNECT_RATE', '5'))  # нових перепідключень на секунду
+    RECONNECT_JITTER = float(os.getenv('RECONNECT_JITTER', '0.5'))  # випадковий зсув, секунди
+    
+    # Прибирання неактивних плеєрів
+    REAPER_INTERVAL = int(os.getenv('REAPER_INTERVAL', '60'))  # секунди між перевірками
+    PLAYER_IDLE_TTL = int(os.getenv('PLAYER_IDLE_TTL', '600'))  # секунди; стан сервера без голосового підключення
+    IDLE_DISCONNECT_TIMEOUT = int(os.getenv('IDLE_DISCONNECT_TIMEOUT', '300'))  # секунди тиші до виходу з каналу, 0 - ніколи
+    
+    # Повідомлення "Зараз грає": редагуємо на місці, часті оновлення об'єднуємо
+    NOW_PLAYING_DEBOUNCE = float(os.getenv('NOW_PLAYING_DEBOUNCE', '1.5'))  # секунди
+    NOW_PLAYING_SCROLL_LIMIT = int(os.getenv('NOW_PLAYING_SCROLL_LIMIT', '5'))  # нових повідомлень до повторної відправки
+    
+    # Живий прогрес у "Зараз грає": один спільний таймер на всі сервери
+    PROGRESS_TICK = float(os.getenv('PROGRESS_TICK', '5'))  # секунди між проходами
+    PROGRESS_EDITS_PER_SECOND = float(os.getenv('PROGRESS_EDITS_PER_SECOND', '1'))  # загальний бюджет редагувань
+    PROGRESS_MIN_INTERVAL = float(os.getenv('PROGRESS_MIN_INTERVAL', '15'))  # секунди між оновленнями одного сервера
+    PROGRESS_BAR_WIDTH = 15
+    
+    # Черга вихідних повідомлень: ліміт Discord на канал (запитів за секунди)
+    OUTBOX_RATE = int(os.getenv('OUTBOX_RATE', '5'))
+    OUTBOX_PER = float(os.getenv('OUTBOX_PER', '5'))
+    OUTBOX_MAX_DEPTH = int(os.getenv('OUTBOX_MAX_DEPTH', '50'))  # задач у черзі одного каналу
+    # Довші очікування 429 discord.py не чекає сам, а кидає RateLimited (мінімум 30 с)
+    DISCORD_MAX_RATELIMIT_TIMEOUT = float(os.getenv('DISCORD_MAX_RATELIMIT_TIMEOUT', '30'))
+    
+    # Метрики Prometheus (порожньо - вимкнено); у кластері порт = METRICS_PORT + CLUSTER_ID
+    METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+    METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+    LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', '0.5'))  # секунди між вимірами затримки event loop
+    
+    # Трейси команд: JSONL з повільними (довші за TRACE_SLOW_MS) і вибірково з рештою (частка TRACE_SAMPLE_RATE)
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', 'false').lower() == 'true'
+    TRACE_PATH = os.getenv('TRACE_PATH', 'data/traces.jsonl')
+    TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', '2000'))
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+    
+    # Відновлення сесії після перезапуску бота
+    SESSION_PATH = os.getenv('SESSION_PATH', 'data/session.json')
+    SESSION_SNAPSHOT_INTERVAL = int(os.getenv('SESSION_SNAPSHOT_INTERVAL', '15'))  # секунди
+    LAVALINK_RESUME_TIMEOUT = int(os.getenv('LAVALINK_RESUME_TIMEOUT', '60'))  # скільки Lavalink тримає сесію, секунди
+    
     # Spotify API (для пошуку та плейлистів)
     SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
     SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
+    SPOTIFY_MAX_WORKERS = int(os.getenv('SPOTIFY_MAX_WORKERS', '4'))  # паралельні запити до Spotify
+    SPOTIFY_TIMEOUT = float(os.getenv('SPOTIFY_TIMEOUT', '10'))  # секунди
+    
+    # Постійний індекс Spotify -> Lavalink (SQLite)
+    TRACK_INDEX_PATH = os.getenv('TRACK_INDEX_PATH', 'data/tracks.db')
+    TRACK_INDEX_MAX_AGE = int(os.getenv('TRACK_INDEX_MAX_AGE', str(7 * 24 * 3600)))  # секунди
+    
+    # Зіставлення треків Spotify: спершу точний пошук за ISRC, потім текстовий з оцінкою.
+    # Лише для джерел, що справді шукають за ISRC (dzisrc з LavaSrc); у YouTube ISRC немає,
+    # тож там це був би ще один текстовий пошук на кожен трек. Порожньо - вимкнено
+    ISRC_SEARCH_SOURCE = os.getenv('ISRC_SEARCH_SOURCE', '')
+    ISRC_SEARCH_TEMPLATE = os.getenv('ISRC_SEARCH_TEMPLATE', '{isrc}')
+    MATCH_MIN_SCORE = float(os.getenv('MATCH_MIN_SCORE', '0.65'))
+    MATCH_CANDIDATES = int(os.getenv('MATCH_CANDIDATES', '5'))
     
     # Налаштування бота
     DEFAULT_VOLUME = 50
-    MAX_QUEUE_SIZE = 100
+    MAX_QUEUE_SIZE = int(os.getenv('MAX_QUEUE_SIZE', '100'))
+    SPOTIFY_MAX_TRACKS = int(os.getenv('SPOTIFY_MAX_TRACKS', str(MAX_QUEUE_SIZE)))  # ліміт імпорту плейлиста
+    QUEUE_LOOKAHEAD = int(os.getenv('QUEUE_LOOKAHEAD', '3'))  # скільки треків наперед шукати заздалегідь
+    QUEUE_HISTORY_SIZE = int(os.getenv('QUEUE_HISTORY_SIZE', '50'))  # скільки зіграних треків пам'ятати
+    
+    # Кеш результатів пошуку треків
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '2048'))
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '1800'))  # секунди
+    
+    # Пошук треків зі Spotify плейлистів
+    SPOTIFY_RESOLVE_TIMEOUT = float(os.getenv('SPOTIFY_RESOLVE_TIMEOUT', '10'))  # секунди на трек
+    NOT_FOUND_REPORT_DELAY = float(os.getenv('NOT_FOUND_REPORT_DELAY', '5'))  # секунди збору ненайдених треків в одне повідомлення
     
     # Проксі (опціонально, для обходу блокувань)
     YTDL_PROXY = os.getenv('YTDL_PROXY', '')
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import sys
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Модулі бота імпортують discord і wavelink на рівні модуля
+pytest.importorskip("discord")
+pytest.importorskip("wavelink")
+
+import wavelink
+
+from cogs.music import Music
+from utils.cache import SingleFlight, TTLCache
+from utils.debounce import Debouncer
+from utils.nodes import NodeBalancer
+from utils.outbox import Outbox
+from utils.track_index import TrackIndex
+from utils.tracks import TrackRecord
+
+
+def make_payload(title, author="Artist", length=180000, isrc=None, identifier=None):
+    """Дані треку у форматі відповіді Lavalink /v4/loadtracks"""
+    identifier = identifier or title.casefold().replace(" ", "-")
+    return TrackRecord(f"enc-{identifier}", identifier=identifier, title=title, author=author,
+                       length=length, uri=f"https://youtu.be/{identifier}", isrc=isrc).to_payload()
+
+
+class StubNode:
+    """Вузол Lavalink без мережі: відповідає на loadtracks заданими треками"""
+    def __init__(self, identifier, tracks=(), status=None, error=None, delay=0):
+        self.identifier = identifier
+        self.tracks = list(tracks)
+        self.status = status or wavelink.NodeStatus.CONNECTED
+        self.error = error
+        self.delay = delay
+        self.players = {}
+        self.requests = []
+        self.in_flight = 0
+
+    async def send(self, method="GET", *, path, params=None, data=None):
+        self.requests.append(params["identifier"] if params else path)
+        self.in_flight += 1
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return {"loadType": "search", "data": self.tracks}
+        finally:
+            self.in_flight -= 1
+
+
+class FakePlayer:
+    """Плеєр wavelink без голосового з'єднання: записує виклики play/set_volume"""
+    def __init__(self, current=None, guild_id=42):
+        self.guild = SimpleNamespace(id=guild_id)
+        self.channel = SimpleNamespace(id=7)
+        self.current = current
+        self.position = 0
+        self.paused = False
+        self.volume = 100
+        self.played = []
+        self.volumes = []
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    def cleanup(self):
+        pass
+
+    async def play(self, track, **kwargs):
+        self.played.append((track, kwargs))
+
+    async def set_volume(self, volume):
+        self.volumes.append(volume)
+
+
+def make_music(tmp_path, nodes):
+    """Ког лише з тим станом, що потрібен для пошуку треків (без бота і підключень)"""
+    music = Music.__new__(Music)
+    music.bot = SimpleNamespace(loop=asyncio.get_running_loop(), shard_count=1)
+    music.search_cache = TTLCache(maxsize=64, ttl=60)
+    music.search_flights = SingleFlight()
+    music.track_index = TrackIndex(str(tmp_path / "tracks.db"))
+    music._index_prefetch = TTLCache(maxsize=64, ttl=60)
+    music._revalidating = set()
+    music._background_tasks = set()
+    music.node_balancer = NodeBalancer([{"identifier": node.identifier} for node in nodes])
+    music.node_balancer.available_nodes = lambda: list(nodes)
+    music.players = {}
+    music.outbox = Outbox()
+    music._not_found = defaultdict(list)
+    music.not_found_reports = Debouncer(0.01)
+    return music
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, **kwargs):
+        self.sent.append(kwargs)
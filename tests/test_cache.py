@@ -0,0 +1,19 @@
+from utils.cache import TTLCache
+
+
+def test_pop_returns_and_removes_live_entry():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("key", "value")
+    assert cache.pop("key") == "value"
+    assert "key" not in cache
+    assert cache.pop("key", "default") == "default"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_pop_never_returns_expired_entry():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set("key", "stale", ttl=-1)
+    assert cache.pop("key") is None
+    assert len(cache) == 0
+    assert cache.evictions == 1
+    assert cache.misses == 1
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.music import Music
+
+from conftest import FakeChannel, make_music
+
+
+class FailingIPC:
+    connected = True
+    cluster_id = 0
+
+    def __init__(self, error):
+        self.error = error
+
+    async def request(self, command, args=None, timeout=5):
+        raise self.error
+
+    async def broadcast(self, command, args=None):
+        raise ConnectionError("немає з'єднання з хабом кластера")
+
+
+async def is_owner(user):
+    return True
+
+
+@pytest.mark.parametrize("error", [asyncio.TimeoutError(), ConnectionError("закрито"), RuntimeError("немає супервізора")])
+def test_cluster_restart_reports_hub_errors(tmp_path, error):
+    async def scenario():
+        music = make_music(tmp_path, [])
+        music.bot.ipc = FailingIPC(error)
+        music.bot.is_owner = is_owner
+        channel = FakeChannel()
+        ctx = SimpleNamespace(interaction=None, channel=channel, author=SimpleNamespace(id=1))
+        await Music.cluster.callback(music, ctx, "restart")
+        await Music.cluster.callback(music, ctx, "status", text="музика")
+        await asyncio.sleep(0.01)
+        return channel.sent
+
+    sent = asyncio.run(scenario())
+    assert len(sent) == 2
+    assert all(message["content"].startswith("❌ Хаб кластера не відповідає") for message in sent)
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cogs.music import MusicControlsView, MusicPlayer
+
+from conftest import FakePlayer, make_music
+
+GUILD_ID = 42
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+def make_interaction(guild_id, voice_channel=None):
+    voice = SimpleNamespace(channel=voice_channel) if voice_channel else None
+    return SimpleNamespace(guild_id=guild_id, user=SimpleNamespace(voice=voice), response=FakeResponse())
+
+
+@pytest.mark.parametrize("guild_id, has_voice, has_player", [
+    (None, False, False),  # кнопка поза сервером
+    (GUILD_ID, False, True),  # бот не в голосовому каналі
+    (GUILD_ID, True, False),  # плеєр сервера вже прибрано - панель застаріла
+])
+def test_rejected_interaction_gets_a_reply(tmp_path, guild_id, has_voice, has_player):
+    async def scenario():
+        music = make_music(tmp_path, [])
+        player = FakePlayer(guild_id=GUILD_ID)
+        music.get_wavelink_player = lambda guild_id: player if has_voice else None
+        if has_player:
+            music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+        view = MusicControlsView(music)
+        interaction = make_interaction(guild_id, player.channel)
+        allowed = await view.interaction_check(interaction)
+        return allowed, interaction.response.sent
+
+    allowed, sent = asyncio.run(scenario())
+    assert not allowed
+    (content, kwargs), = sent
+    assert content.startswith("❌")
+    assert kwargs == {"ephemeral": True}
+
+
+def test_listener_in_same_channel_is_allowed(tmp_path):
+    async def scenario():
+        music = make_music(tmp_path, [])
+        player = FakePlayer(guild_id=GUILD_ID)
+        music.get_wavelink_player = lambda guild_id: player
+        music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+        interaction = make_interaction(GUILD_ID, player.channel)
+        return await MusicControlsView(music).interaction_check(interaction), interaction.response.sent
+
+    assert asyncio.run(scenario()) == (True, [])
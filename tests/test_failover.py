@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import wavelink
+
+from cogs.music import MusicPlayer
+from utils.tracks import PendingTrack
+
+from conftest import FakePlayer, StubNode, make_music, make_payload
+
+GUILD_ID = 42
+
+
+def test_migrate_resolves_pending_current_track(tmp_path):
+    node = StubNode("stub", [make_payload("Song Title")])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player = music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+        pending = PendingTrack("Song Title", title="Song Title")
+        music_player.queue.add(pending)
+        music_player.queue.advance()
+        new_player = FakePlayer()
+
+        async def connect_voice(channel, exclude=()):
+            return new_player
+
+        music.connect_voice = connect_voice
+        assert await music.migrate_player(FakePlayer(), exclude=("old",))
+        return music_player, new_player
+
+    music_player, new_player = asyncio.run(scenario())
+    (track, kwargs), = new_player.played
+    assert track.title == "Song Title"
+    assert kwargs["start"] == 0
+    assert music_player.queue.current_track.title == "Song Title"
+    assert not isinstance(music_player.queue.current_track, PendingTrack)
+    assert not music_player._migrating
+
+
+def test_migrate_with_unresolved_track_keeps_player(tmp_path):
+    node = StubNode("stub", error=RuntimeError("down"))
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player = music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+        music_player.queue.add(PendingTrack("Missing", title="Missing"))
+        music_player.queue.advance()
+        new_player = FakePlayer()
+
+        async def connect_voice(channel, exclude=()):
+            return new_player
+
+        music.connect_voice = connect_voice
+        assert await music.migrate_player(FakePlayer())
+        return music_player, new_player
+
+    music_player, new_player = asyncio.run(scenario())
+    assert new_player.played == []
+    assert new_player.volumes == [music_player.volume]
+    assert not music_player._migrating
+
+
+class PickyNode(StubNode):
+    """Вузол, що нічого не знаходить для запитів зі словом Missing"""
+    async def send(self, method="GET", *, path, params=None, data=None):
+        if params and "Missing" in params["identifier"]:
+            self.requests.append(params["identifier"])
+            return {"loadType": "empty", "data": {}}
+        return await super().send(method, path=path, params=params, data=data)
+
+
+def make_24_7(music, tracks):
+    voice_channel = SimpleNamespace(id=7, name="voice")
+    guild = SimpleNamespace(id=GUILD_ID, get_channel=lambda channel_id: voice_channel)
+    music.bot.get_guild = lambda guild_id: guild
+    new_player = FakePlayer()
+
+    async def connect_voice(channel, exclude=()):
+        return new_player
+
+    music.connect_voice = connect_voice
+    music.get_wavelink_player = lambda guild_id: new_player
+    music_player = music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+    music_player._24_7_mode = True
+    music_player._voice_channel_id = voice_channel.id
+    music_player.queue.add_many(tracks)
+    music_player.queue.advance()
+    return music_player, new_player
+
+
+def test_reconnect_24_7_resolves_pending_current_track(tmp_path):
+    node = PickyNode("stub", [make_payload("Song Title")])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player, new_player = make_24_7(music, [PendingTrack("Song Title")])
+        assert await music.reconnect_24_7(GUILD_ID, music_player)
+        return music_player, new_player
+
+    music_player, new_player = asyncio.run(scenario())
+    (track, _), = new_player.played
+    assert track.title == "Song Title"
+    assert not isinstance(music_player.queue.current_track, PendingTrack)
+
+
+def test_reconnect_24_7_skips_unresolved_current_track(tmp_path):
+    node = PickyNode("stub", [make_payload("Next Song")])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player, new_player = make_24_7(music, [PendingTrack("Missing"), PendingTrack("Next Song")])
+        assert await music.reconnect_24_7(GUILD_ID, music_player)
+        return music_player, new_player
+
+    music_player, new_player = asyncio.run(scenario())
+    (track, _), = new_player.played
+    assert track.title == "Next Song"
+    assert [item.title for item in music_player.queue] == ["Next Song"]
+
+
+def test_watchdog_detects_dropped_node(tmp_path):
+    # Обрив websocket wavelink лише переводить вузол у CONNECTING, без події
+    dropped = StubNode("eu-1", status=wavelink.NodeStatus.CONNECTING)
+    healthy = StubNode("eu-2")
+
+    async def scenario():
+        music = make_music(tmp_path, [healthy])
+        music._failing_nodes = set()
+        failed = []
+
+        async def handle_node_failure(identifier):
+            failed.append(identifier)
+
+        music.handle_node_failure = handle_node_failure
+        music.players_on_node = lambda identifier: [object()] if identifier == "eu-1" else []
+        music.check_nodes([dropped, healthy])
+        await asyncio.sleep(0)
+        return failed
+
+    assert asyncio.run(scenario()) == ["eu-1"]
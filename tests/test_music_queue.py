@@ -0,0 +1,220 @@
+import random
+
+import pytest
+
+from cogs.music import MusicQueue
+from config import Config
+from utils.seqlist import ChunkedList
+from utils.tracks import PendingTrack, TrackRecord
+
+HISTORY_SIZE = 5
+
+
+class ListQueue:
+    """Еталонна модель черги на звичайному списку: position - індекс у списку,
+    зіграні треки понад HISTORY_SIZE відкидаються з початку (крім повтору черги)"""
+    def __init__(self):
+        self.items = []
+        self.position = -1
+        self.loop_mode = "off"
+
+    @property
+    def current(self):
+        return self.items[self.position] if 0 <= self.position < len(self.items) else None
+
+    def advance(self, repeat):
+        if repeat and self.loop_mode == "track" and self.current is not None:
+            return self.current
+        next_pos = self.position + 1
+        if next_pos >= len(self.items):
+            if self.loop_mode == "queue" and self.items:
+                next_pos = 0
+            else:
+                return None
+        self.position = next_pos
+        if self.loop_mode != "queue":
+            while self.position > HISTORY_SIZE:
+                self.items.pop(0)
+                self.position -= 1
+        return self.current
+
+    def upcoming(self, count):
+        tracks = []
+        size = len(self.items)
+        for offset in range(1, min(count, size) + 1):
+            pos = self.position + offset
+            if pos >= size:
+                if self.loop_mode != "queue":
+                    break
+                pos %= size
+            tracks.append(self.items[pos])
+        return tracks
+
+    def replace(self, old, new):
+        start = max(self.position, 0)
+        for index in list(range(start, len(self.items))) + list(range(start)):
+            if self.items[index] is old:
+                self.items[index] = new
+                return True
+        return False
+
+    def remove(self, index):
+        if not 0 <= index < len(self.items):
+            return None
+        if index <= self.position:
+            self.position -= 1
+        return self.items.pop(index)
+
+
+def make_track(number):
+    return PendingTrack(f"query {number}", title=f"Track {number}")
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Дрібні блоки - щоб операції перетинали межі блоків ChunkedList
+    monkeypatch.setattr(ChunkedList, "CHUNK_SIZE", 4)
+    monkeypatch.setattr(Config, "MAX_QUEUE_SIZE", 10 ** 6)
+
+
+def assert_same(queue, model):
+    assert list(queue) == model.items
+    assert all(a is b for a, b in zip(queue, model.items))
+    assert len(queue) == len(model.items)
+    assert queue.position == model.position
+    assert queue.current_track is model.current
+    assert queue.is_empty == (not model.items)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_queue_matches_list_model(small_chunks, seed):
+    rng = random.Random(seed)
+    queue = MusicQueue(history_size=HISTORY_SIZE)
+    model = ListQueue()
+    counter = 0
+
+    for _ in range(400):
+        before, version = list(queue), queue.version
+        op = rng.choices(
+            ["add", "advance", "upcoming", "replace", "remove", "insert_next", "previous", "jump", "loop", "clear",
+             "page"],
+            weights=[25, 25, 8, 8, 8, 5, 5, 5, 5, 1, 5]
+        )[0]
+
+        if op == "add":
+            for _ in range(rng.randint(1, 6)):
+                counter += 1
+                track = make_track(counter)
+                assert queue.add(track)
+                model.items.append(track)
+        elif op == "advance":
+            repeat = rng.random() < 0.7
+            assert queue.advance(repeat) is model.advance(repeat)
+        elif op == "upcoming":
+            count = rng.randint(0, 8)
+            assert queue.upcoming(count) == model.upcoming(count)
+        elif op == "replace" and model.items:
+            old = rng.choice(model.items)
+            new = TrackRecord(f"enc-{id(old)}", title=old.title)
+            assert queue.replace(old, new) == model.replace(old, new)
+            # Елемент, якого вже немає в черзі, не знаходиться
+            assert queue.replace(old, new) is False
+        elif op == "remove":
+            index = rng.randint(-1, len(model.items))
+            assert queue.remove(index) is model.remove(index)
+        elif op == "insert_next":
+            counter += 1
+            track = make_track(counter)
+            index = model.position + 1
+            assert queue.insert(index, track)
+            model.items.insert(index, track)
+        elif op == "previous":
+            expected = model.position > 0
+            assert queue.previous() == expected
+            if expected:
+                model.position -= 2
+        elif op == "jump":
+            target = rng.randint(-1, len(model.items))
+            expected = 0 <= target < len(model.items)
+            assert queue.jump(target) == expected
+            if expected:
+                model.position = target - 1
+        elif op == "loop":
+            mode = rng.choice(["off", "track", "queue"])
+            queue.loop_mode = model.loop_mode = mode
+        elif op == "clear":
+            queue.clear()
+            model.items.clear()
+            model.position = -1
+        elif op == "page":
+            start = rng.randint(0, len(model.items))
+            limit = rng.randint(1, 12)
+            tracks, total = queue.get_queue_list(start, limit)
+            assert tracks == model.items[start:start + limit]
+            assert total == len(model.items)
+
+        assert_same(queue, model)
+        # Знімок сесії перебудовується лише за зміною версії
+        if len(before) != len(queue) or any(a is not b for a, b in zip(before, queue)):
+            assert queue.version != version
+
+
+def test_history_is_bounded(small_chunks):
+    queue = MusicQueue(history_size=HISTORY_SIZE)
+    tracks = [make_track(i) for i in range(20)]
+    queue.add_many(tracks)
+    for _ in range(15):
+        queue.advance()
+
+    # Поточний - 15-й трек, позаду нього лише HISTORY_SIZE зіграних
+    assert queue.current_track is tracks[14]
+    assert queue.position == HISTORY_SIZE
+    assert list(queue) == tracks[14 - HISTORY_SIZE:]
+
+    # previous повертається в історію
+    assert queue.previous()
+    assert queue.advance() is tracks[13]
+
+
+def test_queue_loop_keeps_all_tracks(small_chunks):
+    queue = MusicQueue(history_size=HISTORY_SIZE)
+    queue.loop_mode = "queue"
+    tracks = [make_track(i) for i in range(12)]
+    queue.add_many(tracks)
+    played = [queue.advance() for _ in range(30)]
+    assert played == [tracks[i % 12] for i in range(30)]
+    assert len(queue) == 12
+
+
+def test_shuffle_only_moves_upcoming_tracks(small_chunks):
+    random.seed(1)
+    queue = MusicQueue(history_size=HISTORY_SIZE)
+    tracks = [make_track(i) for i in range(40)]
+    queue.add_many(tracks)
+    for _ in range(8):
+        queue.advance()
+    before = list(queue)
+    played = before[:queue.position + 1]
+
+    queue.shuffle()
+    after = list(queue)
+    assert after[:queue.position + 1] == played
+    assert sorted(map(id, after)) == sorted(map(id, before))
+    assert after != before
+
+
+def test_capacity_ignores_history(small_chunks, monkeypatch):
+    monkeypatch.setattr(Config, "MAX_QUEUE_SIZE", 8)
+    queue = MusicQueue(history_size=HISTORY_SIZE)
+    queue.add_many(make_track(i) for i in range(8))
+    assert queue.free_slots == 0
+    assert not queue.add(make_track(100))
+
+    for _ in range(4):
+        queue.advance()
+    # Зіграні треки пішли в історію і звільнили місце
+    assert len(queue) == 8
+    assert queue.free_slots == 3
+    assert queue.add_many(make_track(200 + i) for i in range(5)) == 3
+    assert queue.free_slots == 0
+    assert not queue.insert(queue.position + 1, make_track(300))
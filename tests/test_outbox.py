@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from bot import MusicBot
+from utils.outbox import Outbox
+
+from conftest import make_music
+
+
+class SlowChannel:
+    """Канал, відправка в який чекає на release"""
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send(self, **kwargs):
+        await self.release.wait()
+        self.sent.append(kwargs)
+        return kwargs
+
+
+def test_bot_raises_rate_limited_for_long_waits():
+    async def run():
+        bot = MusicBot()
+        try:
+            return bot.http.max_ratelimit_timeout
+        finally:
+            await bot.http.close()
+
+    assert asyncio.run(run()) == 30.0
+
+
+def test_rate_limited_job_is_requeued():
+    attempts = []
+
+    async def sender(payload):
+        attempts.append(payload)
+        if len(attempts) == 1:
+            raise discord.RateLimited(0.01)
+        return payload
+
+    async def run():
+        outbox = Outbox()
+        return await outbox.submit(1, sender, "hello"), outbox
+
+    result, outbox = asyncio.run(run())
+    assert result == "hello"
+    assert attempts == ["hello", "hello"]
+    assert outbox.counters["rate_limited"] == 1
+    assert outbox.counters["sent"] == 1
+
+
+def test_send_response_does_not_wait_for_channel_queue(tmp_path):
+    async def run():
+        music = make_music(tmp_path, [])
+        channel = SlowChannel()
+        ctx = SimpleNamespace(interaction=None, channel=channel)
+        await asyncio.wait_for(music.send_response(ctx, "queued"), timeout=1)
+        assert channel.sent == []
+
+        channel.release.set()
+        await asyncio.sleep(0.01)
+        return channel.sent
+
+    assert asyncio.run(run()) == [{"content": "queued", "embed": None}]
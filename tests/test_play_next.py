@@ -0,0 +1,70 @@
+import asyncio
+
+from cogs.music import MusicPlayer
+from utils.tracks import PendingTrack
+
+from conftest import FakePlayer, StubNode, make_music, make_payload
+
+GUILD_ID = 42
+
+
+def setup_player(music, titles):
+    player = FakePlayer(guild_id=GUILD_ID)
+    music.get_wavelink_player = lambda guild_id: player if player.connected else None
+    music_player = music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+    music_player.queue.add_many(PendingTrack(title) for title in titles)
+    return music_player, player
+
+
+def test_play_next_plays_resolved_track(tmp_path):
+    node = StubNode("stub", [make_payload("Song")])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player, player = setup_player(music, ["Song"])
+        await music._play_next(player)
+        return player
+
+    player = asyncio.run(scenario())
+    (track, _), = player.played
+    assert track.title == "Song"
+
+
+def test_play_next_stops_when_player_removed_during_resolve(tmp_path):
+    node = StubNode("stub", [make_payload("Song")], delay=0.05)
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player, player = setup_player(music, ["Song", "Next"])
+        task = asyncio.create_task(music._play_next(player))
+        await asyncio.sleep(0.01)
+        # !stop під час пошуку: черга очищена, плеєр відключений і прибраний
+        music_player.queue.clear()
+        await player.disconnect()
+        music.players.pop(GUILD_ID)
+        await task
+        return music_player, player
+
+    music_player, player = asyncio.run(scenario())
+    assert player.played == []
+    assert len(music_player.queue) == 0
+
+
+def test_play_next_stops_when_queue_moved_during_resolve(tmp_path):
+    node = StubNode("stub", error=RuntimeError("down"), delay=0.05)
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        music_player, player = setup_player(music, ["Missing", "Other"])
+        task = asyncio.create_task(music._play_next(player))
+        await asyncio.sleep(0.01)
+        # Поки шукали, користувач перейшов на інший трек
+        music_player.queue.jump(1)
+        music_player.queue.advance()
+        await task
+        return music_player, player
+
+    music_player, player = asyncio.run(scenario())
+    assert player.played == []
+    # Невдалий пошук не видалив трек, на який перейшли
+    assert [track.title for track in music_player.queue] == ["Missing", "Other"]
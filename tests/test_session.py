@@ -0,0 +1,46 @@
+import asyncio
+
+from cogs.music import MusicPlayer
+from utils.session import SessionStore
+from utils.tracks import PendingTrack, TrackRecord, track_from_dict
+
+from conftest import make_music
+
+GUILD_ID = 42
+
+
+def make_player(music):
+    music_player = music.players[GUILD_ID] = MusicPlayer(music.bot, GUILD_ID)
+    music_player._voice_channel_id = 7
+    music.get_wavelink_player = lambda guild_id: None
+    return music_player
+
+
+def test_snapshot_reuses_tracks_of_unchanged_queue(tmp_path):
+    async def scenario():
+        music = make_music(tmp_path, [])
+        music_player = make_player(music)
+        music_player.queue.add_many(PendingTrack(f"query {i}") for i in range(3))
+
+        first = music.snapshot_player(GUILD_ID, music_player)
+        second = music.snapshot_player(GUILD_ID, music_player)
+        assert second["queue"] is first["queue"]
+
+        pending = music_player.queue.advance()
+        music_player.queue.replace(pending, TrackRecord("enc-1", title="Found"))
+        third = music.snapshot_player(GUILD_ID, music_player)
+        assert third["queue"] is not first["queue"]
+        assert third["queue"][0]["type"] == "track"
+        assert third["position"] == 0
+        return third
+
+    snapshot = asyncio.run(scenario())
+    restored = [track_from_dict(data) for data in snapshot["queue"]]
+    assert [track.title for track in restored] == ["Found", "query 1", "query 2"]
+
+
+def test_session_store_round_trip(tmp_path):
+    store = SessionStore(str(tmp_path / "session.json"))
+    data = {"nodes": {"eu-1": "abc"}, "players": [{"guild_id": GUILD_ID, "queue": []}]}
+    asyncio.run(store.save(data))
+    assert store.load() == data
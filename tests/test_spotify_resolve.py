@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.music import LAVALINK_LOAD_LATENCY, SEARCH_LATENCY, MusicPlayer
+from config import Config
+from utils.tracing import Tracer
+from utils.tracks import PendingTrack
+
+from conftest import FakeChannel, StubNode, make_music, make_payload
+
+SPOTIFY_TRACK = {
+    "id": "spotify-1",
+    "name": "Song Title",
+    "artists": [{"name": "Artist"}],
+    "duration_ms": 181000,
+    "external_ids": {"isrc": "UAABC2400001"},
+}
+
+
+def test_resolve_spotify_track_against_stub_node(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ISRC_SEARCH_SOURCE", "")
+    node = StubNode("stub", [
+        make_payload("Completely Different", author="Someone Else", length=95000),
+        make_payload("Artist - Song Title (Official Video)", author="ArtistVEVO", length=182000),
+    ])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        await music.track_index.open()
+        try:
+            track = await music.resolve_spotify_track(SPOTIFY_TRACK)
+            assert track.title == "Artist - Song Title (Official Video)"
+            assert node.requests == ["ytsearch:Song Title Artist"]
+
+            # У індекс записано саме ті дані, що повернув вузол
+            entry = await music.track_index.get("spotify-1")
+            assert entry is not None
+            assert entry.payload == node.tracks[1]
+
+            # Повторне зіставлення береться з індексу, без звернення до вузла
+            music.search_cache.clear()
+            again = await music.resolve_spotify_track(SPOTIFY_TRACK)
+            assert again.encoded == track.encoded
+            assert len(node.requests) == 1
+        finally:
+            await music.track_index.close()
+
+    asyncio.run(scenario())
+
+
+def test_isrc_source_match_skips_text_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ISRC_SEARCH_SOURCE", "dzisrc")
+    node = StubNode("stub", [make_payload("Song Title", length=181000, isrc="UAABC2400001")])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        await music.track_index.open()
+        try:
+            track = await music.resolve_spotify_track(SPOTIFY_TRACK)
+            assert track.isrc == "UAABC2400001"
+            assert node.requests == ["dzisrc:UAABC2400001"]
+        finally:
+            await music.track_index.close()
+
+    asyncio.run(scenario())
+
+
+def test_unresolved_tracks_are_reported_to_text_channel(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ISRC_SEARCH_SOURCE", "")
+    node = StubNode("stub", [])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        await music.track_index.open()
+        try:
+            music_player = MusicPlayer(music.bot, 42)
+            music_player.text_channel = FakeChannel()
+            music.players[42] = music_player
+
+            missing = [PendingTrack.from_spotify({**SPOTIFY_TRACK, "id": f"missing-{i}", "name": f"Missing {i}"})
+                       for i in range(2)]
+            music_player.queue.add_many(missing)
+            results = await asyncio.gather(*(music.resolve_pending(music_player, pending) for pending in missing))
+            assert results == [None, None]
+
+            # Обидва треки - в одному повідомленні після вікна збору
+            await asyncio.sleep(0.05)
+            sent = music_player.text_channel.sent
+            assert len(sent) == 1
+            embed = sent[0]["embed"]
+            assert embed.title.endswith(": 2")
+            assert "Missing 0" in embed.description and "Missing 1" in embed.description
+        finally:
+            await music.track_index.close()
+
+    asyncio.run(scenario())
+
+
+def histogram_count(histogram, source):
+    data = histogram._values.get((source,))
+    return data[-1] if data else 0
+
+
+def test_spotify_resolution_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ISRC_SEARCH_SOURCE", "")
+    node = StubNode("stub", [make_payload("Song Title", length=181000)])
+
+    async def scenario():
+        music = make_music(tmp_path, [node])
+        await music.track_index.open()
+        gauges = music.create_gauges()
+        try:
+            searches = histogram_count(SEARCH_LATENCY, "spotify")
+            spotify_loads = histogram_count(LAVALINK_LOAD_LATENCY, "spotify")
+            youtube_loads = histogram_count(LAVALINK_LOAD_LATENCY, "youtube")
+
+            await music.resolve_spotify_track(SPOTIFY_TRACK)
+            await music.resolve_spotify_track(SPOTIFY_TRACK)
+
+            assert histogram_count(SEARCH_LATENCY, "spotify") == searches + 2
+            # Пошук треку Spotify на YouTube рахується як spotify
+            assert histogram_count(LAVALINK_LOAD_LATENCY, "spotify") == spotify_loads + 1
+            assert histogram_count(LAVALINK_LOAD_LATENCY, "youtube") == youtube_loads
+
+            cache_gauge, = [gauge for gauge in gauges if gauge.name == "music_cache_events_total"]
+            samples = cache_gauge.samples()
+            assert 'music_cache_events_total{cache="track_index",result="hit"} 1' in samples
+            assert 'music_cache_events_total{cache="track_index",result="miss"} 1' in samples
+            assert 'music_cache_events_total{cache="search",result="miss"} 1' in samples
+        finally:
+            await music.track_index.close()
+
+    asyncio.run(scenario())
+
+
+class FakeSpotify:
+    def __init__(self, pages):
+        self.pages = pages
+
+    async def iter_pages(self, kind, spotify_id, limit=None):
+        for page in self.pages:
+            await asyncio.sleep(0.01)
+            yield page
+
+
+def test_spotify_pages_are_traced_in_stream(tmp_path):
+    tracer = Tracer(str(tmp_path / "traces.jsonl"), enabled=True)
+    tracks = [dict(SPOTIFY_TRACK, id=f"spotify-{i}") for i in range(3)]
+
+    async def scenario():
+        music = make_music(tmp_path, [])
+        music.spotify = FakeSpotify([tracks[:2], tracks[2:]])
+        await music.track_index.open()
+        trace = tracer.start("play")
+        try:
+            requester = SimpleNamespace(id=5)
+            items = []
+            async for item in music.stream_tracks("https://open.spotify.com/playlist/abc", requester):
+                items.append(item)
+                await asyncio.sleep(0.05)  # черга споживає повільніше, ніж вантажаться сторінки
+            return items, list(trace.spans)
+        finally:
+            tracer.finish(trace)
+            await music.track_index.close()
+
+    items, spans = asyncio.run(scenario())
+    assert [item.title for item in items] == ["Song Title"] * 3
+    pages = [item for item in spans if item.name == "spotify.tracks"]
+    assert [(item.attrs["page"], item.attrs.get("results")) for item in pages] == [(0, 2), (1, 1), (2, None)]
+    assert all(item.duration < 0.05 for item in pages)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Обмежений LRU-кеш із TTL для записів"""
+    def __init__(self, maxsize=1024, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _count=False) is not None
+
+    def get(self, key, default=None, *, _count=True):
+        entry = self._data.get(key)
+        if entry is None:
+            if _count:
+                self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            # Запис застарів - видаляємо
+            del self._data[key]
+            self.evictions += 1
+            if _count:
+                self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        if _count:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (expires_at, value)
+
+        # Витісняємо найстаріші записи
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        """Забирає запис з кешу; як і get, застарілий запис не повертає"""
+        entry = self._data.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self.evictions += 1
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """Об'єднує одночасні однакові запити в один спільний future"""
+    def __init__(self):
+        self._calls = {}  # key -> asyncio.Future
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, func):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.shared += 1
+
+        # shield - скасування одного з очікувачів не скасовує запит для інших
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Позначаємо виняток як отриманий, навіть якщо всі очікувачі скасовані
+        if not future.cancelled():
+            future.exception()
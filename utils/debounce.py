@@ -0,0 +1,56 @@
+import asyncio
+import logging
+
+logger = logging.getLogger('MusicBot')
+
+
+class Debouncer:
+    """Об'єднує часті оновлення за ключем: у вікні delay виконується лише останнє.
+
+    Оновлення, що прийшли під час виконання, чекають наступного вікна,
+    тож для одного ключа одночасно виконується не більше одного виклику.
+    """
+    def __init__(self, delay):
+        self.delay = delay
+        self._latest = {}  # key -> корутинна функція без аргументів
+        self._tasks = {}  # key -> asyncio.Task
+        self.submitted = 0
+        self.executed = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def __contains__(self, key):
+        return key in self._latest
+
+    def submit(self, key, func):
+        self.submitted += 1
+        self._latest[key] = func
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    def cancel(self, key):
+        self._latest.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+
+    async def close(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    async def _run(self, key):
+        try:
+            while key in self._latest:
+                await asyncio.sleep(self.delay)
+                func = self._latest.pop(key, None)
+                if func is None:
+                    break
+                self.executed += 1
+                try:
+                    await func()
+                except Exception as e:
+                    logger.error(f"Помилка відкладеного оновлення {key}: {e}")
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+
+logger = logging.getLogger('MusicBot')
+
+# Повідомлення - JSON, по одному на рядок
+STREAM_LIMIT = 1024 * 1024
+
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode() + b'\n')
+    await writer.drain()
+
+
+class IPCServer:
+    """Хаб кластера на Unix-сокеті: статистика воркерів, розсилка команд, запити.
+
+    Воркер -> хаб: hello, ready, stats, broadcast, request.
+    Хаб -> воркер: command, response.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.clients = {}  # cluster_id -> StreamWriter
+        self.stats = {}  # cluster_id -> остання статистика воркера
+        self.handlers = {}  # назва запиту -> async fn(cluster_id, args) -> дані
+        self._ready = {}  # cluster_id -> asyncio.Event
+        self._server = None
+
+    def ready_event(self, cluster_id):
+        return self._ready.setdefault(cluster_id, asyncio.Event())
+
+    async def start(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Сокет від попереднього запуску
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=STREAM_LIMIT)
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in list(self.clients.values()):
+            writer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        cluster_id = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "hello":
+                    cluster_id = message["cluster"]
+                    self.clients[cluster_id] = writer
+                    self.ready_event(cluster_id).clear()
+                elif op == "ready":
+                    self.ready_event(cluster_id).set()
+                elif op == "stats":
+                    self.stats[cluster_id] = message.get("data") or {}
+                elif op == "broadcast":
+                    await self.broadcast(message["command"], message.get("args"))
+                elif op == "request":
+                    asyncio.create_task(self._respond(writer, cluster_id, message))
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"IPC: з'єднання з кластером {cluster_id} перервано: {e}")
+        finally:
+            if cluster_id is not None and self.clients.get(cluster_id) is writer:
+                del self.clients[cluster_id]
+                self.ready_event(cluster_id).clear()
+            writer.close()
+
+    async def _respond(self, writer, cluster_id, message):
+        handler = self.handlers.get(message.get("command"))
+        response = {"op": "response", "id": message.get("id")}
+        try:
+            if handler is None:
+                raise LookupError(f"невідомий запит {message.get('command')}")
+            response["data"] = await handler(cluster_id, message.get("args"))
+        except Exception as e:
+            response["error"] = str(e)
+        try:
+            await send_message(writer, response)
+        except ConnectionError:
+            pass
+
+    async def send(self, cluster_id, command, args=None):
+        writer = self.clients.get(cluster_id)
+        if writer is None:
+            return False
+        try:
+            await send_message(writer, {"op": "command", "command": command, "args": args})
+            return True
+        except ConnectionError as e:
+            logger.warning(f"IPC: не вдалось надіслати {command} кластеру {cluster_id}: {e}")
+            return False
+
+    async def broadcast(self, command, args=None):
+        await asyncio.gather(*(self.send(cluster_id, command, args) for cluster_id in list(self.clients)))
+
+
+class IPCClient:
+    """З'єднання воркера з хабом кластера"""
+    def __init__(self, path, cluster_id):
+        self.path = path
+        self.cluster_id = cluster_id
+        self.handlers = {}  # команда -> async fn(args)
+        self._pending = {}  # id запиту -> Future
+        self._ids = itertools.count(1)
+        self._writer = None
+        self._reader_task = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    def register(self, command, handler):
+        self.handlers[command] = handler
+
+    async def connect(self):
+        reader, self._writer = await asyncio.open_unix_connection(self.path, limit=STREAM_LIMIT)
+        await self._send({"op": "hello", "cluster": self.cluster_id, "pid": os.getpid()})
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+        self._writer = None
+
+    async def _send(self, message):
+        if not self.connected:
+            raise ConnectionError("немає з'єднання з хабом кластера")
+        await send_message(self._writer, message)
+
+    async def _read_loop(self, reader):
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "response":
+                    future = self._pending.pop(message.get("id"), None)
+                    if future and not future.done():
+                        if "error" in message:
+                            future.set_exception(RuntimeError(message["error"]))
+                        else:
+                            future.set_result(message.get("data"))
+                elif op == "command":
+                    handler = self.handlers.get(message.get("command"))
+                    if handler:
+                        asyncio.create_task(self._run_handler(message["command"], handler, message.get("args")))
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"IPC: з'єднання з хабом перервано: {e}")
+        finally:
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("з'єднання з хабом закрито"))
+            self._pending.clear()
+
+    @staticmethod
+    async def _run_handler(command, handler, args):
+        try:
+            await handler(args)
+        except Exception as e:
+            logger.error(f"IPC: помилка обробки команди {command}: {e}")
+
+    async def ready(self):
+        await self._send({"op": "ready"})
+
+    async def send_stats(self, data):
+        await self._send({"op": "stats", "data": data})
+
+    async def broadcast(self, command, args=None):
+        """Команда всім кластерам (включно з цим)"""
+        await self._send({"op": "broadcast", "command": command, "args": args})
+
+    async def request(self, command, args=None, timeout=5):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"op": "request", "id": request_id, "command": command, "args": args})
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
@@ -0,0 +1,97 @@
+import re
+from difflib import SequenceMatcher
+
+# Дужки з "шумом" у назвах YouTube відео
+NOISE_REGEX = re.compile(
+    r'[\(\[][^\)\]]*(official|video|audio|lyric|visualizer|hd|hq|4k|mv|clip|remaster)[^\)\]]*[\)\]]',
+    re.IGNORECASE
+)
+FEAT_REGEX = re.compile(r'\s(feat\.?|ft\.?|featuring)\s.*$', re.IGNORECASE)
+AUTHOR_NOISE_REGEX = re.compile(r'(\s-\stopic$|vevo$|\sofficial$)', re.IGNORECASE)
+PUNCT_REGEX = re.compile(r'[^\w\s]')
+
+# Ваги складових оцінки
+TITLE_WEIGHT = 0.5
+ARTIST_WEIGHT = 0.3
+DURATION_WEIGHT = 0.2
+
+# Різниця тривалості (мс), до якої оцінка максимальна, і після якої - нульова
+DURATION_EXACT_MS = 2000
+DURATION_MAX_MS = 30000
+
+
+def normalize_title(title: str) -> str:
+    title = NOISE_REGEX.sub(' ', title or '')
+    title = FEAT_REGEX.sub('', title)
+    title = PUNCT_REGEX.sub(' ', title.casefold())
+    return " ".join(title.split())
+
+
+def normalize_author(author: str) -> str:
+    author = AUTHOR_NOISE_REGEX.sub('', (author or '').strip())
+    return normalize_title(author)
+
+
+def similarity(a: str, b: str) -> float:
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def duration_score(expected_ms, actual_ms) -> float:
+    if not expected_ms or not actual_ms:
+        return 0.5  # невідомо - нейтрально
+    diff = abs(expected_ms - actual_ms)
+    if diff <= DURATION_EXACT_MS:
+        return 1.0
+    if diff >= DURATION_MAX_MS:
+        return 0.0
+    return 1.0 - (diff - DURATION_EXACT_MS) / (DURATION_MAX_MS - DURATION_EXACT_MS)
+
+
+def score_candidate(spotify_track: dict, candidate) -> float:
+    """Оцінка 0..1 наскільки трек Lavalink відповідає треку Spotify"""
+    expected_title = normalize_title(spotify_track.get('name', ''))
+    artists = [normalize_author(a['name']) for a in spotify_track.get('artists', [])]
+
+    title = normalize_title(candidate.title)
+    author = normalize_author(candidate.author)
+
+    # Назва відео часто має вигляд "Виконавець - Пісня"
+    title_score = max(
+        similarity(expected_title, title),
+        1.0 if expected_title and expected_title in title else 0.0
+    )
+
+    artist_score = 0.0
+    for artist in artists:
+        if artist and (artist in author or artist in title):
+            artist_score = 1.0
+            break
+        artist_score = max(artist_score, similarity(artist, author))
+
+    return (
+        TITLE_WEIGHT * title_score
+        + ARTIST_WEIGHT * artist_score
+        + DURATION_WEIGHT * duration_score(spotify_track.get('duration_ms'), candidate.length)
+    )
+
+
+def is_isrc_match(spotify_track: dict, candidate) -> bool:
+    isrc = spotify_track.get('external_ids', {}).get('isrc')
+    candidate_isrc = getattr(candidate, 'isrc', None)
+    return bool(isrc and candidate_isrc and isrc.upper() == candidate_isrc.upper())
+
+
+def pick_best(spotify_track: dict, candidates, limit=5):
+    """Повертає (найкращий кандидат, оцінка) серед перших limit результатів"""
+    best, best_score = None, -1.0
+    for candidate in list(candidates)[:limit]:
+        if is_isrc_match(spotify_track, candidate):
+            return candidate, 1.0
+        score = score_candidate(spotify_track, candidate)
+        if score > best_score:
+            best, best_score = candidate, score
+    return best, best_score
@@ -0,0 +1,204 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+import wavelink
+
+logger = logging.getLogger('MusicBot')
+
+# REST шляхи Lavalink v4 (відносно uri вузла)
+STATS_PATH = "v4/stats"
+LOADTRACKS_PATH = "v4/loadtracks"
+
+# Запит вже має префікс пошуку Lavalink (ytsearch:, scsearch:, dzisrc: ...)
+SEARCH_PREFIX_REGEX = re.compile(r'^[a-z]+(search|isrc|rec):', re.IGNORECASE)
+URL_REGEX = re.compile(r'https?://')
+
+# Штраф за вузол не з регіону голосового каналу
+REGION_PENALTY = 100.0
+
+
+def parse_nodes(raw, default):
+    """Список вузлів з LAVALINK_NODES (JSON) або один вузол за замовчуванням.
+
+    Формат: [{"identifier": "eu-1", "uri": "https://host:443", "password": "...", "regions": ["rotterdam"]}]
+    """
+    if not raw:
+        return [default]
+    try:
+        nodes = json.loads(raw)
+    except ValueError as e:
+        logger.error(f"Невірний формат LAVALINK_NODES: {e}")
+        return [default]
+    for index, node in enumerate(nodes):
+        node.setdefault("identifier", f"node-{index + 1}")
+        node.setdefault("regions", [])
+    return nodes
+
+
+def build_identifier(query: str, source=None) -> str:
+    """Ідентифікатор для /loadtracks так само, як це робить wavelink.Playable.search"""
+    if URL_REGEX.match(query) or SEARCH_PREFIX_REGEX.match(query):
+        return query
+    if source is None:
+        source = wavelink.TrackSource.YouTubeMusic
+    if isinstance(source, wavelink.TrackSource):
+        prefix = {
+            wavelink.TrackSource.YouTube: "ytsearch",
+            wavelink.TrackSource.YouTubeMusic: "ytmsearch",
+            wavelink.TrackSource.SoundCloud: "scsearch",
+        }[source]
+    else:
+        prefix = str(source).removesuffix(":")
+    return f"{prefix}:{query}"
+
+
+class NodeStats:
+    """Останні відомі показники навантаження вузла"""
+    __slots__ = ("players", "playing", "system_load", "lavalink_load", "frames_deficit",
+                 "frames_nulled", "ping", "updated_at", "failures")
+
+    def __init__(self):
+        self.players = 0
+        self.playing = 0
+        self.system_load = 0.0
+        self.lavalink_load = 0.0
+        self.frames_deficit = 0
+        self.frames_nulled = 0
+        self.ping = None  # мс, час відповіді REST
+        self.updated_at = None
+        self.failures = 0
+
+
+class NodeBalancer:
+    """Вибір вузла Lavalink за навантаженням (гравці, CPU, втрачені кадри, пінг) і регіоном"""
+    def __init__(self, node_configs):
+        self.regions = {node["identifier"]: [r.lower() for r in node.get("regions", [])] for node in node_configs}
+        self.stats = {node["identifier"]: NodeStats() for node in node_configs}
+        self.loads = Counter()  # identifier -> запитів loadtracks у роботі
+        self._next_load = 0
+
+    @staticmethod
+    def create_nodes(node_configs, resume_timeout=60):
+        """session_id з конфігурації вузла дозволяє продовжити попередню сесію Lavalink.
+
+        wavelink 3.0 не приймає session_id у конструкторі Node, але при підключенні
+        надсилає node.session_id у заголовку Session-Id - тож задаємо його до Pool.connect.
+        Це приватний атрибут wavelink, тому версія в requirements.txt закріплена точно
+        (tests/test_nodes.py перевіряє заголовок). REST PATCH /v4/sessions тут не
+        допоможе: він лише налаштовує відновлення поточної сесії, а не стару.
+        """
+        nodes = []
+        for config in node_configs:
+            node = wavelink.Node(
+                identifier=config["identifier"],
+                uri=config["uri"],
+                password=config["password"],
+                resume_timeout=resume_timeout
+            )
+            if config.get("session_id"):
+                if hasattr(node, "_session_id"):
+                    node._session_id = config["session_id"]
+                else:
+                    logger.warning(f"Ця версія wavelink не дозволяє відновити сесію вузла {config['identifier']}")
+            nodes.append(node)
+        return nodes
+
+    @staticmethod
+    def available_nodes():
+        return [node for node in wavelink.Pool.nodes.values() if node.status == wavelink.NodeStatus.CONNECTED]
+
+    def penalty(self, node, region=None):
+        """Чим менше - тим краще (формула як у Lavalink-Client)"""
+        stats = self.stats.setdefault(node.identifier, NodeStats())
+        players = max(len(node.players), stats.playing)
+        cpu = 1.05 ** (100 * stats.system_load) * 10 - 10
+        deficit = 1.03 ** (500 * (stats.frames_deficit / 3000)) * 600 - 600
+        nulled = (1.03 ** (500 * (stats.frames_nulled / 3000)) * 300 - 300) * 2
+        ping = (stats.ping or 0) / 10
+        score = players + cpu + deficit + nulled + ping + stats.failures * 50
+
+        regions = self.regions.get(node.identifier)
+        if region and regions and not any(region.lower().startswith(r) for r in regions):
+            score += REGION_PENALTY
+        return score
+
+    def ranked_nodes(self, region=None, exclude=()):
+        nodes = [node for node in self.available_nodes() if node.identifier not in exclude]
+        return sorted(nodes, key=lambda node: self.penalty(node, region))
+
+    def best_node(self, region=None, exclude=()):
+        nodes = self.ranked_nodes(region, exclude)
+        return nodes[0] if nodes else None
+
+    async def refresh(self):
+        """Оновлює статистику всіх підключених вузлів"""
+        for node in self.available_nodes():
+            stats = self.stats.setdefault(node.identifier, NodeStats())
+            started = time.perf_counter()
+            try:
+                data = await node.send("GET", path=STATS_PATH)
+            except Exception as e:
+                stats.failures += 1
+                logger.warning(f"Не вдалось отримати статистику вузла {node.identifier}: {e}")
+                continue
+
+            stats.ping = (time.perf_counter() - started) * 1000
+            stats.players = data.get("players", 0)
+            stats.playing = data.get("playingPlayers", 0)
+            cpu = data.get("cpu") or {}
+            stats.system_load = cpu.get("systemLoad", 0.0)
+            stats.lavalink_load = cpu.get("lavalinkLoad", 0.0)
+            frames = data.get("frameStats") or {}
+            stats.frames_deficit = frames.get("deficit", 0)
+            stats.frames_nulled = frames.get("nulled", 0)
+            stats.updated_at = time.time()
+            stats.failures = 0
+
+    def load_order(self):
+        """Вузли для пошуку: по колу серед робочих, менш зайняті пошуком - першими.
+
+        Пошук не прив'язаний до плеєра, тож навантаження гравцями (penalty)
+        тут не враховується - інакше всі запити йшли б на один вузол.
+        """
+        nodes = sorted(self.available_nodes(), key=lambda node: node.identifier)
+        if not nodes:
+            return []
+        start = self._next_load % len(nodes)
+        self._next_load += 1
+        nodes = nodes[start:] + nodes[:start]
+        return sorted(nodes, key=lambda node: (self.loads[node.identifier], self.stats.get(node.identifier, NodeStats()).failures > 0))
+
+    async def load_tracks(self, identifier: str):
+        """Завантажує треки з вузла за load_order, при помилці - з наступного.
+
+        Повертає список TrackPayload.
+        """
+        last_error = None
+        for node in self.load_order():
+            self.loads[node.identifier] += 1
+            try:
+                result = await node.send("GET", path=LOADTRACKS_PATH, params={"identifier": identifier})
+            except Exception as e:
+                last_error = e
+                self.stats.setdefault(node.identifier, NodeStats()).failures += 1
+                logger.warning(f"Пошук на вузлі {node.identifier} не вдався: {e}")
+                continue
+            finally:
+                self.loads[node.identifier] -= 1
+
+            load_type = result.get("loadType")
+            data = result.get("data")
+            if load_type == "track":
+                return [data]
+            if load_type == "search":
+                return data
+            if load_type == "playlist":
+                return data["tracks"]
+            if load_type == "error":
+                raise LookupError(data.get("message") if data else "помилка завантаження")
+            return []
+
+        raise last_error or RuntimeError("немає доступних вузлів Lavalink")
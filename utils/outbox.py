@@ -0,0 +1,193 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger('MusicBot')
+
+# Пріоритети (більше - раніше)
+PRIORITY_BACKGROUND = 0
+PRIORITY_UPDATE = 1  # панель керування, автоматичні оновлення
+PRIORITY_REPLY = 2  # відповіді на команди
+
+
+class TokenBucket:
+    """Ліміт Discord на канал: rate запитів за per секунд"""
+    def __init__(self, rate, per):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def delay(self):
+        """Скільки чекати до наступного запиту (0 - можна зараз)"""
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "key", "sender", "payload", "merge", "futures")
+
+    def __init__(self, priority, seq, key, sender, payload, merge):
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.sender = sender
+        self.payload = payload
+        self.merge = merge
+        self.futures = []
+
+    def __lt__(self, other):
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class _ChannelQueue:
+    def __init__(self, rate, per):
+        self.bucket = TokenBucket(rate, per)
+        self.heap = []
+        self.keyed = {}  # key -> _Job, що ще в черзі
+        self.task = None
+
+
+class Outbox:
+    """Вихідні повідомлення з чергою на кожен канал.
+
+    Запити в канал ідуть по одному з урахуванням ліміту (rate за per секунд),
+    тож 429 не блокує корутину, що викликала відправку. Задача з тим самим
+    key замінює ще не відправлену (або об'єднується з нею через merge).
+    """
+    def __init__(self, rate=5, per=5.0, max_depth=50):
+        self.rate = rate
+        self.per = per
+        self.max_depth = max_depth
+        self._queues = {}  # channel_id -> _ChannelQueue
+        self._seq = itertools.count()
+        self.counters = {"sent": 0, "superseded": 0, "merged": 0, "dropped": 0, "failed": 0, "rate_limited": 0}
+        self.wait_time = 0.0  # секунд у сумі задачі чекали на ліміт
+        self.max_depth_seen = 0
+
+    @property
+    def depth(self):
+        return sum(len(queue.heap) for queue in self._queues.values())
+
+    def stats(self):
+        return {
+            **self.counters,
+            "depth": self.depth,
+            "channels": len(self._queues),
+            "max_depth": self.max_depth_seen,
+            "wait_time": self.wait_time,
+        }
+
+    async def close(self):
+        for queue in self._queues.values():
+            if queue.task:
+                queue.task.cancel()
+            for job in queue.heap:
+                for future in job.futures:
+                    if not future.done():
+                        future.cancel()
+        self._queues.clear()
+
+    def submit(self, channel_id, sender, payload, *, key=None, merge=None, priority=PRIORITY_UPDATE):
+        """Ставить sender(payload) у чергу каналу; повертає Future з результатом.
+
+        Якщо в черзі вже є задача з тим самим key, нова її замінює (або
+        merge(старий_payload, новий_payload) об'єднує їх) - обидва Future
+        отримають результат однієї відправки.
+        """
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = _ChannelQueue(self.rate, self.per)
+
+        job = queue.keyed.get(key) if key is not None else None
+        if job is not None:
+            if merge is not None:
+                job.payload = merge(job.payload, payload)
+                self.counters["merged"] += 1
+            else:
+                job.payload = payload
+                job.sender = sender
+                self.counters["superseded"] += 1
+            job.futures.append(future)
+            return future
+
+        if len(queue.heap) >= self.max_depth:
+            # Переповнена черга - відкидаємо фонові оновлення, відповіді лишаємо
+            if priority <= PRIORITY_UPDATE:
+                self.counters["dropped"] += 1
+                future.set_result(None)
+                return future
+
+        job = _Job(priority, next(self._seq), key, sender, payload, merge)
+        job.futures.append(future)
+        heapq.heappush(queue.heap, job)
+        if key is not None:
+            queue.keyed[key] = job
+        self.max_depth_seen = max(self.max_depth_seen, len(queue.heap))
+
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._drain(channel_id, queue))
+        return future
+
+    async def _drain(self, channel_id, queue):
+        try:
+            while queue.heap:
+                delay = queue.bucket.delay()
+                if delay:
+                    self.wait_time += delay
+                    await asyncio.sleep(delay)
+                    continue
+
+                job = heapq.heappop(queue.heap)
+                if job.key is not None:
+                    queue.keyed.pop(job.key, None)
+                queue.bucket.take()
+
+                try:
+                    result = await job.sender(job.payload)
+                except discord.RateLimited as e:
+                    # Discord обмежив довше, ніж max_ratelimit_timeout бота (коротші
+                    # очікування discord.py робить сам) - повертаємо задачу і чекаємо
+                    self.counters["rate_limited"] += 1
+                    self.wait_time += e.retry_after
+                    self._requeue(queue, job)
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                except Exception as e:
+                    self.counters["failed"] += 1
+                    for future in job.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                self.counters["sent"] += 1
+                for future in job.futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            if self._queues.get(channel_id) is queue and not queue.heap:
+                del self._queues[channel_id]
+
+    def _requeue(self, queue, job):
+        newer = queue.keyed.get(job.key) if job.key is not None else None
+        if newer is not None:
+            # Поки чекали, прийшла новіша версія - віддаємо їй і наші Future
+            if job.merge is not None:
+                newer.payload = job.merge(job.payload, newer.payload)
+            newer.futures.extend(job.futures)
+            return
+        heapq.heappush(queue.heap, job)
+        if job.key is not None:
+            queue.keyed[job.key] = job
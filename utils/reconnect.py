@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+logger = logging.getLogger('MusicBot')
+
+
+class ReconnectScheduler:
+    """Черга перепідключень після збоїв: пріоритет, обмеження паралельності й темпу.
+
+    Замість одночасного перепідключення всіх серверів задачі виконуються
+    не більше ніж concurrency одночасно і не частіше rate стартів на секунду
+    (з випадковим зсувом до jitter секунд). Першими йдуть задачі з більшим
+    priority (напр. кількість слухачів у каналі).
+    """
+    def __init__(self, concurrency=5, rate=5.0, jitter=0.5):
+        self.concurrency = max(1, concurrency)
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.jitter = jitter
+        self._heap = []  # (-priority, seq, key); застарілі записи пропускаються
+        self._queued = {}  # key -> (seq, func)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self._next_start = 0.0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._backlog_started = None
+        self._backlog_jobs = 0
+        self.last_drain = None  # (кількість задач, секунди)
+
+    def __len__(self):
+        return len(self._queued)
+
+    @property
+    def busy(self):
+        return bool(self._queued) or self.in_flight > 0
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._queued.clear()
+        self._heap.clear()
+
+    def submit(self, key, func, priority=0):
+        """func - корутинна функція без аргументів, що повертає True при успіху.
+
+        Повторна задача з тим самим ключем замінює ту, що ще в черзі.
+        """
+        if not self.busy:
+            self._backlog_started = time.monotonic()
+            self._backlog_jobs = 0
+        if key not in self._queued:
+            self._backlog_jobs += 1
+        seq = next(self._seq)
+        self._queued[key] = (seq, func)
+        heapq.heappush(self._heap, (-priority, seq, key))
+        self._wakeup.set()
+
+    def cancel(self, key):
+        return self._queued.pop(key, None) is not None
+
+    def stats(self):
+        return {
+            "queued": len(self._queued),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_drain": self.last_drain,
+            "backlog_age": time.monotonic() - self._backlog_started if self.busy and self._backlog_started else None,
+        }
+
+    async def _next_job(self):
+        while True:
+            while self._heap:
+                _, seq, key = heapq.heappop(self._heap)
+                entry = self._queued.get(key)
+                if entry is not None and entry[0] == seq:
+                    del self._queued[key]
+                    return key, entry[1]
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _worker(self):
+        while True:
+            key, func = await self._next_job()
+            self.in_flight += 1
+            try:
+                # Спільний для всіх воркерів темп стартів + випадковий зсув
+                now = time.monotonic()
+                start = max(now, self._next_start)
+                self._next_start = start + self.interval
+                delay = start - now + random.uniform(0, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                ok = await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Помилка перепідключення {key}: {e}")
+                ok = False
+            finally:
+                self.in_flight -= 1
+
+            if ok is False:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._check_drained()
+
+    def _check_drained(self):
+        if self.busy or self._backlog_started is None:
+            return
+        duration = time.monotonic() - self._backlog_started
+        self.last_drain = (self._backlog_jobs, duration)
+        self._backlog_started = None
+        if self._backlog_jobs > 1:
+            logger.info(f"Черга перепідключень: {self._backlog_jobs} задач виконано за {duration:.1f} с")
@@ -0,0 +1,132 @@
+import random
+from bisect import bisect_right
+
+
+class ChunkedList:
+    """Послідовність з блоків фіксованого розміру для великих черг.
+
+    Доступ за індексом - O(log n) (бінарний пошук по межах блоків),
+    вставка/видалення в будь-якому місці - O(CHUNK_SIZE + n / CHUNK_SIZE)
+    замість O(n) зсуву звичайного списку.
+    """
+    CHUNK_SIZE = 256
+
+    def __init__(self, iterable=()):
+        self._chunks = []
+        self._ends = []  # _ends[i] - кількість елементів у блоках 0..i
+        self.extend(iterable)
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def __bool__(self):
+        return bool(self._ends)
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def _reindex(self, start=0):
+        """Перераховує межі блоків, починаючи з блоку start"""
+        total = self._ends[start - 1] if start > 0 else 0
+        ends = []
+        for chunk in self._chunks[start:]:
+            total += len(chunk)
+            ends.append(total)
+        self._ends[start:] = ends
+
+    def _locate(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("ChunkedList index out of range")
+        chunk_index = bisect_right(self._ends, index)
+        start = self._ends[chunk_index - 1] if chunk_index else 0
+        return chunk_index, index - start
+
+    def __getitem__(self, index):
+        chunk_index, offset = self._locate(index)
+        return self._chunks[chunk_index][offset]
+
+    def __setitem__(self, index, value):
+        chunk_index, offset = self._locate(index)
+        self._chunks[chunk_index][offset] = value
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def append(self, value):
+        if not self._chunks or len(self._chunks[-1]) >= self.CHUNK_SIZE:
+            self._chunks.append([value])
+            self._ends.append(len(self) + 1)
+        else:
+            self._chunks[-1].append(value)
+            self._ends[-1] += 1
+
+    def extend(self, iterable):
+        for value in iterable:
+            self.append(value)
+
+    def insert(self, index, value):
+        size = len(self)
+        if index < 0:
+            index = max(0, index + size)
+        if index >= size:
+            self.append(value)
+            return
+
+        chunk_index, offset = self._locate(index)
+        chunk = self._chunks[chunk_index]
+        chunk.insert(offset, value)
+        # Занадто великий блок ділимо навпіл
+        if len(chunk) > 2 * self.CHUNK_SIZE:
+            half = len(chunk) // 2
+            self._chunks[chunk_index:chunk_index + 1] = [chunk[:half], chunk[half:]]
+        self._reindex(chunk_index)
+
+    def pop(self, index=-1):
+        chunk_index, offset = self._locate(index)
+        chunk = self._chunks[chunk_index]
+        value = chunk.pop(offset)
+        if not chunk:
+            del self._chunks[chunk_index]
+        self._reindex(chunk_index)
+        return value
+
+    def clear(self):
+        self._chunks.clear()
+        self._ends.clear()
+
+    def slice(self, start, stop):
+        """Елементи [start, stop) без копіювання всього списку"""
+        start = max(0, start)
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        result = []
+        chunk_index, offset = self._locate(start)
+        while len(result) < stop - start:
+            chunk = self._chunks[chunk_index]
+            result.extend(chunk[offset:offset + (stop - start - len(result))])
+            chunk_index += 1
+            offset = 0
+        return result
+
+    def find(self, value, start=0):
+        """Індекс елемента (за ідентичністю) або -1"""
+        index = 0
+        for chunk in self._chunks:
+            if index + len(chunk) > start:
+                for offset in range(max(0, start - index), len(chunk)):
+                    if chunk[offset] is value:
+                        return index + offset
+            index += len(chunk)
+        return -1
+
+    def shuffle(self, start=0, rng=random):
+        """Перемішування Фішера-Єйтса на місці для елементів з індексу start"""
+        for i in range(len(self) - 1, start, -1):
+            j = rng.randint(start, i)
+            if i != j:
+                self[i], self[j] = self[j], self[i]
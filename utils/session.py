@@ -0,0 +1,39 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger('MusicBot')
+
+
+class SessionStore:
+    """Збереження ID сесій Lavalink і знімків плеєрів між перезапусками бота (JSON файл)"""
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Синхронне читання - викликається один раз при старті"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {"nodes": {}, "players": []}
+        except (OSError, ValueError) as e:
+            logger.error(f"Не вдалось прочитати збережену сесію: {e}")
+            return {"nodes": {}, "players": []}
+        data.setdefault("nodes", {})
+        data.setdefault("players", [])
+        return data
+
+    def _write(self, data):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Атомарний запис: тимчасовий файл + заміна
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    async def save(self, data):
+        await asyncio.to_thread(self._write, data)
@@ -0,0 +1,163 @@
+import asyncio
+import functools
+from contextlib import aclosing
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import spotipy
+from requests.adapters import HTTPAdapter
+from spotipy.oauth2 import SpotifyClientCredentials
+from urllib3.util.retry import Retry
+
+from utils.tracing import span
+
+logger = logging.getLogger('MusicBot')
+
+# Максимальні розміри сторінок/пакетів Spotify Web API
+PLAYLIST_PAGE_SIZE = 100
+ALBUM_PAGE_SIZE = 50
+TRACKS_BATCH_SIZE = 50
+
+# Тільки поля, потрібні для пошуку - менші відповіді від Spotify
+PLAYLIST_FIELDS = "items(track(id,name,artists(name),duration_ms,external_ids,is_local)),next"
+
+SPOTIFY_URL_REGEX = re.compile(
+    r'(?:https?://open\.spotify\.com/(?:intl-[\w-]+/)?|spotify:)(track|playlist|album)[/:]([A-Za-z0-9]+)'
+)
+
+
+def parse_spotify_url(url: str):
+    """Повертає (тип, id) для посилання Spotify або (None, None)"""
+    match = SPOTIFY_URL_REGEX.search(url)
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+
+def build_search_query(track: dict) -> str:
+    """Пошуковий запит для YouTube з метаданих треку Spotify"""
+    return f"{track['name']} {' '.join([a['name'] for a in track['artists']])}"
+
+
+class SpotifyClient:
+    """Асинхронна обгортка над spotipy.
+
+    Блокуючі HTTP-запити spotipy виконуються у власному пулі потоків,
+    тож цикл подій discord.py ніколи не чекає на Spotify.
+    """
+    def __init__(self, client_id, client_secret, *, max_workers=4, timeout=10, pool_size=10):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spotify')
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+        # Спільна сесія з пулом з'єднань і повторами для 429/5xx
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'POST']),
+                respect_retry_after_header=True
+            )
+        )
+        session.mount('https://', adapter)
+        self._session = session
+
+        self._client = spotipy.Spotify(
+            auth_manager=SpotifyClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret,
+                requests_session=session,
+                requests_timeout=timeout
+            ),
+            requests_session=session,
+            requests_timeout=timeout,
+            retries=0
+        )
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Спан включає очікування семафора - видно, коли запити стоять у черзі
+        with span("spotify.api", method=getattr(func, '__name__', str(func))):
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs)),
+                    # Запас на повтори всередині HTTPAdapter
+                    timeout=self.timeout * 2
+                )
+
+    async def track(self, track_id):
+        return await self._call(self._client.track, track_id)
+
+    async def tracks(self, track_ids):
+        """Повні об'єкти треків, до 50 ID за запит"""
+        return await self._call(self._client.tracks, track_ids)
+
+    async def playlist_tracks(self, playlist_id, limit=100, offset=0, fields=None):
+        return await self._call(
+            self._client.playlist_tracks, playlist_id, fields=fields, limit=limit, offset=offset
+        )
+
+    async def album_tracks(self, album_id, limit=50, offset=0):
+        return await self._call(self._client.album_tracks, album_id, limit=limit, offset=offset)
+
+    async def iter_pages(self, kind, spotify_id, limit=None):
+        """Ліниво віддає сторінки об'єктів треків, підвантажуючи їх по мірі потреби"""
+        if kind == "track":
+            yield [await self.track(spotify_id)]
+            return
+
+        if kind == "playlist":
+            pages = self._iter_playlist_tracks(spotify_id)
+        elif kind == "album":
+            pages = self._iter_album_tracks(spotify_id)
+        else:
+            return
+
+        count = 0
+        async with aclosing(pages):
+            async for page in pages:
+                if limit is not None:
+                    page = page[:limit - count]
+                count += len(page)
+                if page:
+                    yield page
+                if limit is not None and count >= limit:
+                    return
+
+    async def _iter_playlist_tracks(self, playlist_id):
+        offset = 0
+        while True:
+            results = await self.playlist_tracks(
+                playlist_id, limit=PLAYLIST_PAGE_SIZE, offset=offset, fields=PLAYLIST_FIELDS
+            )
+            # Локальні файли та видалені треки пошуком не знайти
+            yield [
+                item['track'] for item in results['items']
+                if item.get('track') and not item['track'].get('is_local')
+            ]
+            if not results.get('next'):
+                return
+            offset += PLAYLIST_PAGE_SIZE
+
+    async def _iter_album_tracks(self, album_id):
+        offset = 0
+        while True:
+            results = await self.album_tracks(album_id, limit=ALBUM_PAGE_SIZE, offset=offset)
+            # Сторінка альбому містить спрощені треки - дозавантажуємо повні пакетом
+            ids = [track['id'] for track in results['items'] if track.get('id')]
+            for start in range(0, len(ids), TRACKS_BATCH_SIZE):
+                batch = await self.tracks(ids[start:start + TRACKS_BATCH_SIZE])
+                yield [track for track in batch['tracks'] if track]
+            if not results.get('next'):
+                return
+            offset += ALBUM_PAGE_SIZE
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
@@ -0,0 +1,90 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger('MusicBot')
+
+
+class TimerHeap:
+    """Відкладені виклики на одній задачі: купа дедлайнів замість циклів опитування.
+
+    Поки таймерів немає, задача просто чекає - без пробуджень.
+    Повторне schedule з тим самим ключем замінює попередній таймер.
+    """
+    def __init__(self):
+        self._heap = []  # (when, seq, key); скасовані записи видаляються ліниво
+        self._entries = {}  # key -> (when, seq, callback)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def remaining(self, key):
+        """Секунди до спрацювання таймера або None"""
+        entry = self._entries.get(key)
+        return max(0.0, entry[0] - time.monotonic()) if entry else None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        for task in list(self._running):
+            task.cancel()
+        self._entries.clear()
+        self._heap.clear()
+
+    def schedule(self, key, delay, callback):
+        """callback - корутинна функція без аргументів"""
+        when = time.monotonic() + max(0.0, delay)
+        seq = next(self._seq)
+        self._entries[key] = (when, seq, callback)
+        heapq.heappush(self._heap, (when, seq, key))
+        if self._heap[0][1] == seq:
+            self._wakeup.set()
+        # Забагато скасованих записів - перебудовуємо купу
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(when, seq, key) for key, (when, seq, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, key):
+        return self._entries.pop(key, None) is not None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is None or entry[1] != seq:
+                    continue
+                del self._entries[key]
+                task = asyncio.create_task(self._fire(key, entry[2]))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            if self._heap:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._heap[0][0] - now)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._wakeup.wait()
+
+    @staticmethod
+    async def _fire(key, callback):
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"Помилка таймера {key}: {e}")
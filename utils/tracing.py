@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+logger = logging.getLogger('MusicBot')
+
+# Трейс поточної команди; дочірні задачі (create_task) успадковують його разом з контекстом
+_current_trace = ContextVar('music_trace', default=None)
+
+
+class _NoopSpan:
+    """Спан без трейсу - нічого не вимірює"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("trace", "name", "attrs", "started", "duration", "error")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.started = None
+        self.duration = None
+        self.error = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.trace.add(self)
+        return False
+
+    def set(self, **attrs):
+        """Атрибути, відомі лише після виконання (напр. кількість результатів)"""
+        self.attrs.update(attrs)
+
+    def to_dict(self, trace_started):
+        data = {
+            "name": self.name,
+            "offset_ms": round((self.started - trace_started) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "attrs", "started", "timestamp", "spans", "finished", "dropped", "max_spans", "_token")
+
+    def __init__(self, name, attrs, max_spans):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.spans = []
+        self.finished = False
+        self.dropped = 0
+        self.max_spans = max_spans
+        self._token = None
+
+    def add(self, span):
+        # Фонові задачі, створені під час команди, можуть завершитись після неї
+        if self.finished:
+            return
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+
+def span(name, **attrs):
+    """Контекстний менеджер спану в поточному трейсі (без трейсу - NOOP_SPAN)"""
+    trace = _current_trace.get()
+    if trace is None or trace.finished:
+        return NOOP_SPAN
+    return Span(trace, name, attrs)
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+class Tracer:
+    """Трейси команд: спани по етапах (пошук, Lavalink, голос, відповіді).
+
+    Записуються у JSONL лише повільні трейси (довші за slow_ms) і випадкова
+    частка sample_rate решти. Вимкнений трейсер не створює трейсів, і span()
+    зводиться до одного читання ContextVar.
+    """
+    def __init__(self, path, enabled=False, slow_ms=2000.0, sample_rate=0.0, max_spans=200):
+        self.path = path
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self._lock = threading.Lock()
+        self._writes = set()
+        self.started = 0
+        self.written = 0
+
+    def start(self, name, **attrs):
+        if not self.enabled:
+            return None
+        trace = Trace(name, attrs, self.max_spans)
+        trace._token = _current_trace.set(trace)
+        self.started += 1
+        return trace
+
+    def finish(self, trace, error=None):
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        try:
+            _current_trace.reset(trace._token)
+        except ValueError:
+            # Завершення з іншого контексту - просто прибираємо трейс з поточного
+            _current_trace.set(None)
+
+        duration_ms = (time.perf_counter() - trace.started) * 1000
+        slow = duration_ms >= self.slow_ms
+        if not slow and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return
+        if slow:
+            logger.warning(f"Повільна команда {trace.name}: {duration_ms:.0f} мс (трейс {trace.trace_id})")
+
+        record = {
+            "trace_id": trace.trace_id,
+            "name": trace.name,
+            "timestamp": trace.timestamp,
+            "duration_ms": round(duration_ms, 2),
+            "slow": slow,
+            "attrs": trace.attrs,
+            "spans": [item.to_dict(trace.started) for item in trace.spans],
+        }
+        if error:
+            record["error"] = error
+        if trace.dropped:
+            record["dropped_spans"] = trace.dropped
+        task = asyncio.create_task(self._write(record))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str, separators=(',', ':'))
+        try:
+            await asyncio.to_thread(self._append, line)
+            self.written += 1
+        except OSError as e:
+            logger.error(f"Не вдалось записати трейс: {e}")
+
+    def _append(self, line):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+    async def close(self):
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('MusicBot')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    spotify_id TEXT PRIMARY KEY,
+    isrc TEXT,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_isrc ON tracks (isrc);
+"""
+
+
+class IndexEntry:
+    __slots__ = ("payload", "updated_at")
+
+    def __init__(self, payload, updated_at):
+        self.payload = payload
+        self.updated_at = updated_at
+
+    @property
+    def age(self):
+        return time.time() - self.updated_at
+
+
+class TrackIndex:
+    """Постійний індекс Spotify ID / ISRC -> закодований трек Lavalink (SQLite, WAL).
+
+    Усі звернення до бази йдуть через один окремий потік, щоб не блокувати цикл подій.
+    """
+    def __init__(self, path, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='track-index')
+        self._conn = None
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def open(self):
+        self._conn = await self._run(self._connect)
+        count = await self._run(self._count)
+        logger.info(f"Індекс треків відкрито: {self.path} ({count} записів)")
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def is_stale(self, entry: IndexEntry):
+        return entry.age > self.max_age
+
+    def _get(self, spotify_id, isrc):
+        row = None
+        if spotify_id:
+            row = self._conn.execute(
+                "SELECT payload, updated_at FROM tracks WHERE spotify_id = ?", (spotify_id,)
+            ).fetchone()
+        if row is None and isrc:
+            row = self._conn.execute(
+                "SELECT payload, updated_at FROM tracks WHERE isrc = ? ORDER BY updated_at DESC LIMIT 1", (isrc,)
+            ).fetchone()
+        return row
+
+    async def get(self, spotify_id=None, isrc=None):
+        if self._conn is None:
+            return None
+        row = await self._run(self._get, spotify_id, isrc)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return IndexEntry(json.loads(row[0]), row[1])
+
+    def _get_many(self, spotify_ids, isrcs):
+        rows = []
+        if spotify_ids:
+            placeholders = ",".join("?" * len(spotify_ids))
+            rows += self._conn.execute(
+                f"SELECT spotify_id, isrc, payload, updated_at FROM tracks WHERE spotify_id IN ({placeholders})",
+                spotify_ids
+            ).fetchall()
+        if isrcs:
+            placeholders = ",".join("?" * len(isrcs))
+            rows += self._conn.execute(
+                f"SELECT spotify_id, isrc, payload, updated_at FROM tracks WHERE isrc IN ({placeholders})",
+                isrcs
+            ).fetchall()
+        return rows
+
+    async def get_many(self, tracks):
+        """Пакетний пошук для списку (spotify_id, isrc) - один запит до бази на сторінку.
+
+        Повертає dict spotify_id -> IndexEntry (None якщо трека немає в індексі).
+        """
+        result = {spotify_id: None for spotify_id, _ in tracks if spotify_id}
+        if self._conn is None or not tracks:
+            return result
+
+        spotify_ids = [spotify_id for spotify_id, _ in tracks if spotify_id]
+        isrcs = [isrc for _, isrc in tracks if isrc]
+        rows = await self._run(self._get_many, spotify_ids, isrcs)
+
+        by_id = {}
+        by_isrc = {}
+        for row_id, row_isrc, payload, updated_at in rows:
+            by_id[row_id] = (payload, updated_at)
+            if row_isrc and (row_isrc not in by_isrc or by_isrc[row_isrc][1] < updated_at):
+                by_isrc[row_isrc] = (payload, updated_at)
+
+        for spotify_id, isrc in tracks:
+            if not spotify_id:
+                continue
+            row = by_id.get(spotify_id) or (by_isrc.get(isrc) if isrc else None)
+            if row is None:
+                self.misses += 1
+                continue
+            self.hits += 1
+            result[spotify_id] = IndexEntry(json.loads(row[0]), row[1])
+        return result
+
+    def _put(self, spotify_id, isrc, payload):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO tracks (spotify_id, isrc, payload, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(spotify_id) DO UPDATE SET "
+                "isrc = excluded.isrc, payload = excluded.payload, updated_at = excluded.updated_at",
+                (spotify_id, isrc, json.dumps(payload, separators=(',', ':')), time.time())
+            )
+
+    async def put(self, spotify_id, isrc, payload):
+        if self._conn is None or not spotify_id:
+            return
+        await self._run(self._put, spotify_id, isrc, payload)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
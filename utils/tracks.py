@@ -0,0 +1,151 @@
+import wavelink
+
+
+class TrackRecord:
+    """Компактний запис треку в черзі замість повного wavelink.Playable.
+
+    Зберігає лише закодований трек і поля для відображення; Playable
+    створюється тільки в момент відтворення (to_playable).
+    """
+    __slots__ = ("encoded", "identifier", "title", "author", "length", "uri", "artwork",
+                 "isrc", "source", "is_stream", "requester_id")
+
+    def __init__(self, encoded, *, identifier="", title="", author="", length=0, uri=None,
+                 artwork=None, isrc=None, source="youtube", is_stream=False, requester_id=None):
+        self.encoded = encoded
+        self.identifier = identifier
+        self.title = title
+        self.author = author
+        self.length = length
+        self.uri = uri
+        self.artwork = artwork
+        self.isrc = isrc
+        self.source = source
+        self.is_stream = is_stream
+        self.requester_id = requester_id
+
+    @classmethod
+    def from_playable(cls, track, requester_id=None):
+        if requester_id is None:
+            requester_id = getattr(track, 'requester_id', None)
+        if requester_id is None and getattr(track, 'requester', None) is not None:
+            requester_id = track.requester.id
+        return cls(
+            track.encoded,
+            identifier=track.identifier,
+            title=track.title,
+            author=track.author,
+            length=track.length,
+            uri=track.uri,
+            artwork=track.artwork,
+            isrc=track.isrc,
+            source=track.source,
+            is_stream=track.is_stream,
+            requester_id=requester_id
+        )
+
+    def to_payload(self):
+        """Дані треку у форматі Lavalink (TrackPayload)"""
+        return {
+            "encoded": self.encoded,
+            "info": {
+                "identifier": self.identifier,
+                "isSeekable": not self.is_stream,
+                "author": self.author,
+                "length": self.length,
+                "isStream": self.is_stream,
+                "position": 0,
+                "title": self.title,
+                "uri": self.uri,
+                "artworkUrl": self.artwork,
+                "isrc": self.isrc,
+                "sourceName": self.source,
+            },
+            "pluginInfo": {},
+            "userData": {},
+        }
+
+    @classmethod
+    def from_payload(cls, data, requester_id=None):
+        info = data["info"]
+        return cls(
+            data["encoded"],
+            identifier=info.get("identifier", ""),
+            title=info.get("title", ""),
+            author=info.get("author", ""),
+            length=info.get("length", 0),
+            uri=info.get("uri"),
+            artwork=info.get("artworkUrl"),
+            isrc=info.get("isrc"),
+            source=info.get("sourceName", "youtube"),
+            is_stream=info.get("isStream", False),
+            requester_id=requester_id
+        )
+
+    def to_dict(self):
+        return {"type": "track", "payload": self.to_payload(), "requester_id": self.requester_id}
+
+    def to_playable(self):
+        playable = wavelink.Playable(self.to_payload())
+        playable.requester_id = self.requester_id
+        return playable
+
+
+class PendingTrack:
+    """Легкий нерозв'язаний елемент черги (запит або трек Spotify + ID того, хто замовив).
+
+    Має ті самі поля для відображення, що й TrackRecord, тож черга
+    показується без звернень до Lavalink. Реальний трек знаходиться перед
+    відтворенням (або заздалегідь - див. Music.prefetch_ahead).
+    """
+    __slots__ = ("query", "spotify_track", "requester_id", "title", "author", "length", "uri", "artwork", "task")
+
+    def __init__(self, query=None, *, spotify_track=None, requester_id=None,
+                 title=None, author=None, length=0, uri=None, artwork=None):
+        self.query = query
+        self.spotify_track = spotify_track
+        self.requester_id = requester_id
+        self.title = title or query or "?"
+        self.author = author
+        self.length = length
+        self.uri = uri
+        self.artwork = artwork
+        self.task = None  # asyncio.Task пошуку, якщо вже запущено
+
+    @classmethod
+    def from_spotify(cls, track: dict, requester_id=None):
+        return cls(
+            spotify_track=track,
+            requester_id=requester_id,
+            title=track.get('name'),
+            author=", ".join(a['name'] for a in track.get('artists', [])),
+            length=track.get('duration_ms') or 0,
+            uri=f"https://open.spotify.com/track/{track['id']}" if track.get('id') else None
+        )
+
+    def to_dict(self):
+        return {
+            "type": "pending",
+            "query": self.query,
+            "spotify_track": self.spotify_track,
+            "requester_id": self.requester_id,
+            "title": self.title,
+            "author": self.author,
+            "length": self.length,
+            "uri": self.uri,
+        }
+
+
+def track_from_dict(data):
+    """Відновлює елемент черги зі збереженого словника (див. to_dict)"""
+    if data.get("type") == "pending":
+        return PendingTrack(
+            data.get("query"),
+            spotify_track=data.get("spotify_track"),
+            requester_id=data.get("requester_id"),
+            title=data.get("title"),
+            author=data.get("author"),
+            length=data.get("length") or 0,
+            uri=data.get("uri")
+        )
+    return TrackRecord.from_payload(data["payload"], requester_id=data.get("requester_id"))